@@ -5,10 +5,32 @@ import os
 import threading
 import time
 import requests
-from PIL import Image, ImageTk
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from PIL import Image, ImageTk, ImageOps, ImageDraw, ImageFont, ImageChops
 import pytesseract
 from PIL import ImageGrab
 import re
+import tempfile
+import sqlite3
+import queue
+import uuid
+import hashlib
+import argparse
+import io
+import random
+import difflib
+import tracemalloc
+import sys
+import shutil
+import math
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from email.parser import BytesParser
+from email import policy as email_policy
+from dataclasses import dataclass, replace
 from datetime import datetime
 import keyboard
 
@@ -16,13 +38,1831 @@ import keyboard
 # Example for Windows:
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-class BeeSwarmNotifier:
+class ConfigStore:
+    # Write-behind store for bee_swarm_config.json.
+    # Changes are coalesced over a short window and written atomically (temp file + rename) off the GUI thread.
+    def __init__(self, path, delay=0.5, on_error=None):
+        self.path = path
+        self.delay = delay
+        self.on_error = on_error
+        self.dirty_fields = set() # Config keys changed since the last write
+        self._pending = None # Serialized config waiting to be written
+        self._deadline = None # Monotonic time at which the pending config is written
+        self._closed = False
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock() # Keeps writes in order between the writer thread and flush()
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def update(self, config, fields):
+        if not fields:
+            return
+        # Serialize on the caller's thread so the writer never iterates a dict the GUI is mutating
+        data = json.dumps(config, indent=4)
+        with self._cond:
+            self.dirty_fields.update(fields)
+            self._pending = data
+            if self._deadline is None:
+                self._deadline = time.monotonic() + self.delay
+            self._cond.notify()
+
+    def flush(self):
+        # Write any pending changes right now, on the calling thread
+        with self._write_lock:
+            with self._cond:
+                data = self._pending
+                self._pending = None
+                self._deadline = None
+                self.dirty_fields = set()
+            if data is None:
+                return
+            try:
+                self._write_atomic(data)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._deadline is None or self._deadline > time.monotonic()):
+                    timeout = None if self._deadline is None else self._deadline - time.monotonic()
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+            self.flush()
+
+    def _write_atomic(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".bee_swarm_config.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path) # Atomic on both Windows and POSIX
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+class DetectionJournal:
+    # Local SQLite (WAL) record of every detection.
+    # record() and update_delivery() only enqueue; a background thread writes them in batched transactions.
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS detections (
+            id INTEGER PRIMARY KEY,
+            detection_id TEXT NOT NULL UNIQUE,
+            ts REAL NOT NULL,
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            mode TEXT,
+            raw_line TEXT,
+            region TEXT,
+            frame_hash TEXT,
+            delivery TEXT NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE INDEX IF NOT EXISTS idx_detections_key_ts ON detections (key, ts);
+        CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections (ts);
+    """
+
+    def __init__(self, path, retention_days=0, batch_size=200, flush_interval=1.0, on_error=None, read_only=False):
+        self.path = path
+        self.retention_days = retention_days # 0 keeps rows forever
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        self._queue = queue.Queue()
+        self._last_prune = 0.0
+        self._thread = None
+        self.writable = not read_only # Cleared when the writer cannot open the database, so nothing piles up unwritten
+        if not read_only: # Read-only journals are for queries and never start the writer
+            self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._thread.start()
+
+    def record(self, kind, key, mode, raw_line, region, frame_hash, delivery="pending", ts=None, quantity=1):
+        detection_id = uuid.uuid4().hex
+        row = (detection_id, ts if ts is not None else time.time(), kind, key, mode, raw_line, region, frame_hash, delivery, quantity)
+        if self.writable:
+            self._queue.put(("insert", row))
+        return detection_id
+
+    def update_delivery(self, detection_id, delivery):
+        if detection_id and self.writable:
+            self._queue.put(("update", (delivery, detection_id)))
+
+    def close(self, timeout=5.0):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _writer_loop(self):
+        try:
+            connection = self._connect()
+            connection.executescript(self.SCHEMA)
+            if not self._has_quantity(connection): # Journals written before quantities were parsed
+                connection.execute("ALTER TABLE detections ADD COLUMN quantity INTEGER NOT NULL DEFAULT 1")
+        except Exception as e:
+            self.writable = False
+            while True: # Drop what was queued before the failure; nothing will write it
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if self.on_error:
+                self.on_error(e)
+            return
+
+        closing = False
+        while not closing:
+            # Block for the first operation, then drain whatever else is queued into the same transaction
+            try:
+                operation = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._maybe_prune(connection)
+                continue
+            batch = []
+            while operation is not None:
+                batch.append(operation)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    operation = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            closing = operation is None
+
+            try:
+                with connection:
+                    for op, values in batch:
+                        if op == "insert":
+                            connection.execute(
+                                "INSERT INTO detections (detection_id, ts, kind, key, mode, raw_line, region, frame_hash, delivery, quantity) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", values)
+                        else:
+                            connection.execute("UPDATE detections SET delivery = ? WHERE detection_id = ?", values)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+            self._maybe_prune(connection)
+        connection.close()
+
+    def _maybe_prune(self, connection):
+        # Keep the table bounded when a retention period is configured; checked at most once an hour
+        if self.retention_days <= 0 or time.time() - self._last_prune < 3600:
+            return
+        self._last_prune = time.time()
+        try:
+            with connection:
+                connection.execute("DELETE FROM detections WHERE ts < ?", (time.time() - self.retention_days * 86400,))
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+
+    @staticmethod
+    def _has_quantity(connection):
+        return any(column[1] == "quantity" for column in connection.execute("PRAGMA table_info(detections)"))
+
+    def drop_counts(self, since=None, until=None, kind=None, key=None):
+        # [(kind, key, count, total quantity)] for detections in [since, until), most frequent first
+        query = "SELECT kind, key, COUNT(*), {quantity} FROM detections WHERE ts >= ? AND ts < ?"
+        params = [since or 0.0, until or time.time() + 1]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if key:
+            query += " AND key = ?"
+            params.append(key)
+        query += " GROUP BY kind, key ORDER BY COUNT(*) DESC, key"
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            query = query.format(quantity="SUM(quantity)" if self._has_quantity(connection) else "COUNT(*)")
+            return connection.execute(query, params).fetchall()
+        finally:
+            connection.close()
+
+    def count_series(self, key, since, until=None, bucket_seconds=3600):
+        # [(bucket start timestamp, count)] for one key, served by the (key, ts) index
+        until = until or time.time() + 1
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            return connection.execute(
+                "SELECT CAST(ts / ? AS INTEGER) * ?, COUNT(*) FROM detections "
+                "WHERE key = ? AND ts >= ? AND ts < ? GROUP BY 1 ORDER BY 1",
+                (bucket_seconds, bucket_seconds, key, since, until)).fetchall()
+        finally:
+            connection.close()
+
+class ItemDigest:
+    # In-memory per-item counts for silent drops, drained once per digest window
     def __init__(self):
-        self.root = tk.Tk()
-        self.root.title("Bee Swarm Smart Notifier v1.1")
-        self.root.geometry("550x400") # Slightly increased size
-        self.root.resizable(False, False)
-        self.root.overrideredirect(True)
+        self._lock = threading.Lock()
+        self._counts = {}
+        self.window_start = time.time()
+
+    def add(self, item_name, quantity=1):
+        with self._lock:
+            self._counts[item_name] = self._counts.get(item_name, 0) + quantity
+
+    def take(self):
+        # Returns (window_start, window_end, {item: count}) and starts a new window
+        with self._lock:
+            counts = self._counts
+            window_start = self.window_start
+            self._counts = {}
+            self.window_start = time.time()
+        return window_start, self.window_start, counts
+
+class OutboundSpool:
+    # Durable queue for webhook posts that could not be delivered.
+    # Entries are appended to spool.log (JSON lines, "put" and "ack" records) with attachments stored beside it,
+    # so they survive restarts. A replayer thread resends them per webhook URL with exponential backoff.
+    def __init__(self, directory, send, max_bytes=50 * 1024 * 1024, max_age=24 * 3600,
+                 base_delay=5.0, max_delay=300.0, on_result=None):
+        self.directory = directory
+        self.send = send # send(url, content, attachment_bytes, filename) -> response
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_result = on_result # on_result(entry, status) with status "sent", "rejected", "expired" or "evicted"
+        self.log_path = os.path.join(directory, "spool.log")
+        self._entries = OrderedDict() # id -> entry, oldest first
+        self._pending_per_url = {}
+        self._backoff = {} # url -> (consecutive failures, next attempt time)
+        self._total_bytes = 0
+        self._log_records = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        self._thread = threading.Thread(target=self._replay_loop, daemon=True, name="spool")
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def has_pending(self, url):
+        return self._pending_per_url.get(url, 0) > 0
+
+    def put(self, url, content, attachment=None, filename=None, kind="alert", detection_id=None, timing=None):
+        entry = {
+            "op": "put",
+            "id": uuid.uuid4().hex,
+            "ts": time.time(),
+            "url": url,
+            "content": content,
+            "filename": filename,
+            "attachment": None,
+            "kind": kind, # "live_feed" entries are evicted first when the spool is full
+            "detection_id": detection_id,
+            "timing": timing, # Latency stage timestamps, finished once the replayer delivers it
+            "size": len(content.encode("utf-8"))
+        }
+        if attachment is not None:
+            entry["attachment"] = entry["id"] + ".bin"
+            entry["size"] += len(attachment)
+            with open(os.path.join(self.directory, entry["attachment"]), 'wb') as f:
+                f.write(attachment)
+                f.flush()
+                os.fsync(f.fileno())
+
+        with self._lock:
+            self._append(entry)
+            self._add(entry)
+            self._enforce_limits()
+        self._wake.set()
+        return entry["id"]
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join(5.0)
+        with self._lock:
+            self._log.close()
+
+    def _load(self):
+        # Rebuild pending entries from the log, tolerating a torn last line, then compact it
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("op") == "put":
+                        self._add(record)
+                    elif record.get("op") == "ack" and record.get("id") in self._entries:
+                        self._remove(record["id"])
+        self._compact()
+
+        # Attachments whose entries are gone (e.g. crash between ack and delete)
+        referenced = {entry["attachment"] for entry in self._entries.values() if entry.get("attachment")}
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin") and name not in referenced:
+                os.remove(os.path.join(self.directory, name))
+
+    def _add(self, entry):
+        self._entries[entry["id"]] = entry
+        self._pending_per_url[entry["url"]] = self._pending_per_url.get(entry["url"], 0) + 1
+        self._total_bytes += entry.get("size", 0)
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        self._pending_per_url[entry["url"]] -= 1
+        if not self._pending_per_url[entry["url"]]:
+            del self._pending_per_url[entry["url"]]
+            self._backoff.pop(entry["url"], None)
+        self._total_bytes -= entry.get("size", 0)
+        return entry
+
+    def _append(self, record):
+        self._log.write(json.dumps(record) + "\n")
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._log_records += 1
+
+    def _ack(self, entry_id, status):
+        # Must be called with the lock held
+        if entry_id not in self._entries:
+            return
+        entry = self._remove(entry_id)
+        self._append({"op": "ack", "id": entry_id, "status": status})
+        if entry.get("attachment"):
+            try:
+                os.remove(os.path.join(self.directory, entry["attachment"]))
+            except OSError:
+                pass
+        if self.on_result:
+            self.on_result(entry, status)
+        # Rewrite the log once acked records dominate it
+        if self._log_records > 1000 and self._log_records > 4 * len(self._entries):
+            self._compact()
+
+    def _compact(self):
+        temp_path = self.log_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if getattr(self, "_log", None):
+            self._log.close()
+        os.replace(temp_path, self.log_path)
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+        self._log_records = len(self._entries)
+
+    def _enforce_limits(self):
+        # Must be called with the lock held
+        cutoff = time.time() - self.max_age
+        for entry_id, entry in list(self._entries.items()):
+            if entry["ts"] < cutoff:
+                self._ack(entry_id, "expired")
+        while self._total_bytes > self.max_bytes and self._entries:
+            victim = next((entry_id for entry_id, entry in self._entries.items() if entry.get("kind") == "live_feed"),
+                          next(iter(self._entries)))
+            self._ack(victim, "evicted")
+
+    def _next_due(self):
+        # Oldest entry per URL whose backoff has elapsed; later entries for a URL wait their turn
+        now = time.time()
+        seen_urls = set()
+        with self._lock:
+            self._enforce_limits()
+            for entry in self._entries.values():
+                if entry["url"] in seen_urls:
+                    continue
+                seen_urls.add(entry["url"])
+                failures, next_attempt = self._backoff.get(entry["url"], (0, 0.0))
+                if next_attempt <= now:
+                    return entry
+        return None
+
+    def _seconds_until_due(self):
+        with self._lock:
+            if not self._entries:
+                return 60.0
+            next_attempts = [self._backoff.get(url, (0, 0.0))[1] for url in self._pending_per_url]
+        return min(60.0, max(0.05, min(next_attempts) - time.time()))
+
+    def _replay_loop(self):
+        while not self._closed:
+            entry = self._next_due()
+            if entry is None:
+                self._wake.wait(self._seconds_until_due())
+                self._wake.clear()
+                continue
+
+            status_code = None
+            retry_after = None
+            try:
+                attachment = None
+                if entry.get("attachment"):
+                    with open(os.path.join(self.directory, entry["attachment"]), 'rb') as f:
+                        attachment = f.read()
+                response = self.send(entry["url"], entry["content"], attachment, entry.get("filename"))
+                status_code = response.status_code
+                retry_after = response.headers.get("Retry-After")
+                if status_code == 429:
+                    retry_after = response.json().get("retry_after", retry_after) # Discord's body value is exact, the header is rounded up
+            except Exception:
+                pass
+
+            with self._lock:
+                if status_code in (200, 204):
+                    self._ack(entry["id"], "sent")
+                    self._backoff.pop(entry["url"], None)
+                elif status_code is not None and 400 <= status_code < 500 and status_code != 429:
+                    self._ack(entry["id"], "rejected") # Retrying a bad request or a deleted webhook will not help
+                elif entry["id"] in self._entries:
+                    failures = self._backoff.get(entry["url"], (0, 0.0))[0] + 1
+                    delay = min(self.max_delay, self.base_delay * 2 ** (failures - 1)) * random.uniform(0.8, 1.2)
+                    try:
+                        delay = max(delay, float(retry_after)) if retry_after else delay
+                    except ValueError:
+                        pass
+                    self._backoff[entry["url"]] = (failures, time.time() + delay)
+
+class WebhookClient:
+    # Shared HTTP layer for all webhook traffic: one keep-alive session with connection pools per host,
+    # connect/read timeouts, and a cap on concurrent requests to the same webhook
+    def __init__(self, connect_timeout=5.0, read_timeout=15.0, max_concurrent_per_webhook=2):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_concurrent_per_webhook = max_concurrent_per_webhook
+        self._semaphores = {}
+        self._lock = threading.Lock()
+        self._latencies = [] # Recent send latencies in seconds, newest last
+        self.requests_sent = 0
+        self.errors = 0
+        self.connections_opened = 0 # Actual TCP(+TLS) connects; every other request reused a pooled connection
+
+        client = self
+        def counting(connection_class):
+            class CountingConnection(connection_class):
+                def connect(self):
+                    super().connect()
+                    with client._lock:
+                        client.connections_opened += 1
+            return CountingConnection
+
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=20, pool_maxsize=max(4, max_concurrent_per_webhook), max_retries=0)
+        self.adapter.poolmanager.pool_classes_by_scheme = {
+            "http": type("CountingHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": counting(HTTPConnection)}),
+            "https": type("CountingHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": counting(HTTPSConnection)})
+        }
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def post(self, url, **kwargs):
+        with self._lock:
+            semaphore = self._semaphores.get(url)
+            if semaphore is None:
+                semaphore = self._semaphores[url] = threading.BoundedSemaphore(self.max_concurrent_per_webhook)
+        with semaphore:
+            started = time.perf_counter()
+            try:
+                return self.session.post(url, timeout=self.timeout, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    self.requests_sent += 1
+                    self._latencies.append(time.perf_counter() - started)
+                    del self._latencies[:-500]
+
+    def stats(self):
+        # Connections opened vs. requests made tells how often keep-alive saved a TCP+TLS handshake
+        with self._lock:
+            latencies = sorted(self._latencies)
+            requests_sent = self.requests_sent
+            errors = self.errors
+            opened = self.connections_opened
+        return {
+            "requests": requests_sent,
+            "errors": errors,
+            "connections_opened": opened,
+            "connections_reused": max(0, requests_sent - errors - opened),
+            "latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+        }
+
+    def close(self):
+        self.session.close()
+
+def webhook_label(url):
+    # A name for a webhook URL that is safe to log: Discord webhooks by id, never with their token
+    match = re.search(r"/webhooks/(\d+)/", url)
+    if match:
+        return f"webhook {match.group(1)}"
+    parsed = urlparse(url)
+    return parsed.netloc + parsed.path
+
+class DestinationQueues:
+    # One FIFO and sender thread per webhook destination. A detection routed to several channels is posted to all
+    # of them at once, and a slow or failing channel only holds up its own queue. Also keeps per-destination stats.
+    def __init__(self, max_pending=100, on_error=None):
+        self.max_pending = max_pending
+        self.on_error = on_error # on_error(exception) when a job raises
+        self._closed = False
+        self._queues = {} # url -> queue.Queue of jobs (None stops the sender)
+        self._threads = []
+        self._labels = {} # url -> name shown in stats
+        self._stats = {} # url -> {"sent", "spooled", "failed", "max_pending", "seconds": deque}
+        self._lock = threading.Lock()
+
+    def submit(self, url, label, job):
+        # Runs job() on the destination's sender thread; False when max_pending jobs are already waiting there.
+        # After close() the senders are gone, so a late job runs on the caller's thread instead of being lost.
+        with self._lock:
+            closed = self._closed
+        if closed:
+            self._call(job)
+            return True
+        with self._lock:
+            jobs = self._queues.get(url)
+            if jobs is None:
+                jobs = self._queues[url] = queue.Queue()
+                thread = threading.Thread(target=self._run, args=(jobs,), daemon=True, name="deliver")
+                thread.start()
+                self._threads.append(thread)
+            self._labels.setdefault(url, label)
+            if jobs.qsize() >= self.max_pending:
+                return False
+            jobs.put(job)
+            stats = self._entry(url)
+            stats["max_pending"] = max(stats["max_pending"], jobs.qsize())
+        return True
+
+    def _run(self, jobs):
+        while True:
+            job = jobs.get()
+            try:
+                if job is None:
+                    return
+                self._call(job)
+            finally:
+                jobs.task_done()
+
+    def _call(self, job):
+        try:
+            job()
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+
+    def _entry(self, url):
+        return self._stats.setdefault(url, {"sent": 0, "spooled": 0, "failed": 0, "max_pending": 0, "seconds": deque(maxlen=500)})
+
+    def record(self, url, status, seconds):
+        # Called for every delivery attempt, queued or not
+        with self._lock:
+            stats = self._entry(url)
+            stats[status] = stats.get(status, 0) + 1
+            stats["seconds"].append(seconds)
+
+    def pending(self):
+        with self._lock:
+            return sum(jobs.unfinished_tasks for jobs in self._queues.values())
+
+    def wait_idle(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self.pending() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return not self.pending()
+
+    def stats(self):
+        # {label: {"sent", "spooled", "failed", "max_pending", "latency_avg", "latency_p95"}}
+        with self._lock:
+            result = {}
+            for url, stats in self._stats.items():
+                seconds = sorted(stats["seconds"])
+                result[self._labels.get(url) or webhook_label(url)] = {
+                    "sent": stats["sent"], "spooled": stats["spooled"], "failed": stats["failed"],
+                    "max_pending": stats["max_pending"],
+                    "latency_avg": sum(seconds) / len(seconds) if seconds else 0.0,
+                    "latency_p95": seconds[int(len(seconds) * 0.95)] if seconds else 0.0
+                }
+            return result
+
+    def close(self, timeout=5.0):
+        # Lets queued notifications go out (or into the spool) for up to timeout seconds
+        self.wait_idle(timeout)
+        with self._lock:
+            self._closed = True
+            queues = list(self._queues.values())
+        for jobs in queues:
+            jobs.put(None)
+        for thread in self._threads:
+            thread.join(0.5)
+
+class LatencyTracker:
+    # Detection latency from capture to webhook acknowledgement. Each detection carries a dict of stage timestamps
+    # ("captured", "ocr_done", "matched", "queued", "acked"); record() turns them into per-stage durations.
+    # "captured" is the first frame the text was read in, so the text was on screen up to one scan_interval earlier.
+    STAGES = (("ocr", "captured", "ocr_done"), ("match", "ocr_done", "matched"), ("queue", "matched", "queued"),
+              ("delivery", "queued", "acked"), ("total", "captured", "acked"))
+
+    def __init__(self, samples_per_key=500):
+        self.samples_per_key = samples_per_key
+        self._samples = {} # (kind, key) -> deque of {stage: seconds}
+        self._lock = threading.Lock()
+
+    def record(self, kind, key, stamps):
+        durations = {stage: stamps[end] - stamps[start] for stage, start, end in self.STAGES
+                     if stamps.get(start) is not None and stamps.get(end) is not None}
+        if not durations:
+            return
+        with self._lock:
+            self._samples.setdefault((kind, key), deque(maxlen=self.samples_per_key)).append(durations)
+
+    def summary(self, kind=None, key=None):
+        # {stage: {"count", "p50", "p95", "p99", "max"}} over every detection matching kind/key (None matches all)
+        with self._lock:
+            samples = [durations for (sample_kind, sample_key), entries in self._samples.items()
+                       if kind in (None, sample_kind) and key in (None, sample_key) for durations in entries]
+        result = {}
+        for stage, start, end in self.STAGES:
+            values = sorted(durations[stage] for durations in samples if stage in durations)
+            if values:
+                result[stage] = {"count": len(values), "p50": values[len(values) // 2],
+                                 "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                                 "p99": values[min(len(values) - 1, int(len(values) * 0.99))], "max": values[-1]}
+        return result
+
+    def keys(self):
+        with self._lock:
+            return sorted(self._samples)
+
+    def report(self):
+        # {"overall": summary, "event:<key>" / "item:<key>": summary}
+        report = {"overall": self.summary()}
+        for kind, key in self.keys():
+            report[f"{kind}:{key}"] = self.summary(kind, key)
+        return report
+
+class FrameRing:
+    # Bounded hand-off between the capture thread and OCR. "drop_oldest" passes frames on in order and discards the
+    # oldest one when full; "latest" passes on only the newest frame and discards anything older.
+    POLICIES = ("latest", "drop_oldest")
+
+    def __init__(self, capacity=4, policy="latest"):
+        self.capacity = max(1, capacity)
+        self.policy = policy if policy in self.POLICIES else "latest"
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self._frames = deque() # (image, capture timestamp)
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, image, captured_at):
+        with self._cond:
+            if len(self._frames) >= self.capacity:
+                self._frames.popleft()
+                self.dropped += 1
+            self._frames.append((image, captured_at))
+            self.captured += 1
+            self._cond.notify()
+
+    def get(self, timeout):
+        # Next frame as (image, captured_at), or None after timeout or once closed
+        with self._cond:
+            if not self._frames and not self._closed:
+                self._cond.wait(timeout)
+            if not self._frames or self._closed:
+                return None
+            if self.policy == "latest":
+                frame = self._frames.pop()
+                self.dropped += len(self._frames)
+                self._frames.clear()
+            else:
+                frame = self._frames.popleft()
+            self.processed += 1
+            return frame
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def drain(self):
+        # Frames still waiting, oldest first, even after close(); for flushing on stop
+        with self._cond:
+            frames = list(self._frames)
+            self._frames.clear()
+            return frames
+
+    def stats(self):
+        with self._cond:
+            return {"captured": self.captured, "processed": self.processed, "dropped": self.dropped, "pending": len(self._frames)}
+
+class TimeLapse:
+    # Live Feed frames collected between uploads, downscaled as they arrive and packed into one animated WebP or GIF,
+    # or a contact-sheet grid, so a whole batch of ticks costs a single webhook post
+    FORMATS = ("webp", "gif", "grid")
+    PLAYBACK_MS = 400 # Per frame in the animations, whatever the capture interval
+    SHEET_WIDTH = 1920 # Contact sheets are scaled down to fit this
+
+    def __init__(self, fmt="webp", max_frames=10, max_seconds=60.0, max_width=640, playback_ms=PLAYBACK_MS):
+        self.fmt = fmt if fmt in self.FORMATS else "webp"
+        self.playback_ms = playback_ms
+        self.max_frames = max(2, max_frames)
+        self.max_seconds = max_seconds
+        self.max_width = max_width
+        self._frames = [] # (downscaled image, capture timestamp)
+        self._lock = threading.Lock()
+
+    def add(self, image, captured_at):
+        if image.width > self.max_width:
+            image = image.resize((self.max_width, max(1, round(image.height * self.max_width / image.width))), Image.BILINEAR)
+        with self._lock:
+            self._frames.append((image, captured_at))
+
+    def due(self, now):
+        # A batch is due every max_frames frames, or max_seconds after its first frame
+        with self._lock:
+            return bool(self._frames) and (len(self._frames) >= self.max_frames or now - self._frames[0][1] >= self.max_seconds)
+
+    def take(self):
+        with self._lock:
+            frames, self._frames = self._frames, []
+        return frames
+
+    def encode(self, frames):
+        # (bytes, file extension) for one batch
+        buffer = io.BytesIO()
+        images = [image for image, _ in frames]
+        if self.fmt == "grid":
+            self._contact_sheet(frames).save(buffer, format="JPEG", quality=80)
+            return buffer.getvalue(), "jpg"
+        if self.fmt == "webp":
+            try:
+                images[0].save(buffer, format="WEBP", save_all=True, append_images=images[1:], duration=self.playback_ms,
+                               loop=0, quality=70, method=4)
+                return buffer.getvalue(), "webp"
+            except (OSError, KeyError, ValueError):
+                buffer = io.BytesIO() # Pillow built without WebP; GIF always works
+        palette = [image.convert("P", palette=Image.ADAPTIVE, colors=128) for image in images]
+        palette[0].save(buffer, format="GIF", save_all=True, append_images=palette[1:], duration=self.playback_ms, loop=0, optimize=True)
+        return buffer.getvalue(), "gif"
+
+    def _contact_sheet(self, frames):
+        columns = math.ceil(math.sqrt(len(frames)))
+        rows = math.ceil(len(frames) / columns)
+        width, height = frames[0][0].size
+        scale = min(1.0, self.SHEET_WIDTH / (columns * width))
+        cell = (max(1, round(width * scale)), max(1, round(height * scale)))
+        sheet = Image.new("RGB", (columns * cell[0], rows * cell[1]), (0, 0, 0))
+        draw = ImageDraw.Draw(sheet)
+        for index, (image, captured_at) in enumerate(frames):
+            x, y = (index % columns) * cell[0], (index // columns) * cell[1]
+            sheet.paste(image.resize(cell, Image.BILINEAR) if scale < 1 else image, (x, y))
+            draw.text((x + 4, y + 4), f"{datetime.fromtimestamp(captured_at):%H:%M:%S}", fill=(255, 255, 0))
+        return sheet
+
+class FrameHistory:
+    # The last few seconds of OCR-region captures as JPEG bytes, bounded by age and memory, so an event alert can
+    # show what happened just before and after the matched line. burst() raises the capture rate for a while.
+    def __init__(self, pre_seconds=3.0, post_seconds=2.0, frame_interval=0.5, burst_interval=0.2, max_bytes=20 * 1024 * 1024,
+                 fmt="webp", quality=70):
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.frame_interval = frame_interval
+        self.burst_interval = burst_interval
+        self.max_bytes = max_bytes
+        self.max_age = pre_seconds + post_seconds + 5.0 # Frames must outlive the wait for the post-event part
+        self.fmt = fmt
+        self.quality = quality
+        self.bytes = 0
+        self.peak_bytes = 0
+        self.added = 0
+        self.evicted_for_memory = 0
+        self.encode_seconds = 0.0
+        self.clips = 0
+        self.clip_seconds = 0.0
+        self._frames = deque() # (capture timestamp, JPEG bytes), oldest first
+        self._burst_until = 0.0
+        self._lock = threading.Lock()
+
+    def interval(self, now):
+        # Seconds until the capture loop should grab the next history frame
+        return self.burst_interval if now < self._burst_until else self.frame_interval
+
+    def burst(self, until):
+        with self._lock:
+            self._burst_until = max(self._burst_until, until)
+
+    def add(self, image, captured_at):
+        started = time.perf_counter()
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, format="JPEG", quality=self.quality)
+        data = buffer.getvalue()
+        with self._lock:
+            self.encode_seconds += time.perf_counter() - started
+            self._frames.append((captured_at, data))
+            self.bytes += len(data)
+            self.added += 1
+            while self._frames and captured_at - self._frames[0][0] > self.max_age:
+                self.bytes -= len(self._frames.popleft()[1])
+            while len(self._frames) > 1 and self.bytes > self.max_bytes:
+                self.bytes -= len(self._frames.popleft()[1])
+                self.evicted_for_memory += 1
+            self.peak_bytes = max(self.peak_bytes, self.bytes)
+
+    def clip(self, detected_at):
+        # (bytes, file extension, frame count) for the frames around detected_at, or None when there are fewer than two
+        started = time.perf_counter()
+        with self._lock:
+            window = [(captured_at, data) for captured_at, data in self._frames
+                      if detected_at - self.pre_seconds <= captured_at <= detected_at + self.post_seconds]
+        if len(window) < 2:
+            return None
+        frames = [(Image.open(io.BytesIO(data)), captured_at) for captured_at, data in window]
+        playback_ms = round(1000 * (window[-1][0] - window[0][0]) / (len(window) - 1)) # Real time, as captured
+        data, extension = TimeLapse(self.fmt, max_width=frames[0][0].width, playback_ms=max(20, playback_ms)).encode(frames)
+        with self._lock:
+            self.clips += 1
+            self.clip_seconds += time.perf_counter() - started
+        return data, extension, len(frames)
+
+    def stats(self):
+        with self._lock:
+            return {"frames": len(self._frames), "bytes": self.bytes, "peak_bytes": self.peak_bytes, "added": self.added,
+                    "evicted_for_memory": self.evicted_for_memory, "encode_seconds": self.encode_seconds,
+                    "clips": self.clips, "clip_seconds": self.clip_seconds}
+
+# Content types for webhook attachments, by file extension
+ATTACHMENT_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".gif": "image/gif", ".webp": "image/webp"}
+
+class SamplingProfiler:
+    # Samples the call stacks of the named threads every interval via sys._current_frames(). Nothing is hooked
+    # into the profiled code, so when no profiler is running the detection and send paths pay nothing at all.
+    def __init__(self, thread_names, interval=0.01, duration=60.0, on_done=None):
+        self.thread_names = set(thread_names)
+        self.interval = interval
+        self.duration = duration
+        self.on_done = on_done # on_done(profiler) from the sampling thread once it has finished
+        self.samples = 0
+        self.stacks = {} # (thread name, (filename, first line, function), ...) root first -> sample count
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="profiler")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        deadline = time.monotonic() + self.duration
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate() if thread.name in self.thread_names}
+            for ident, frame in sys._current_frames().items():
+                if ident not in names:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                key = (names[ident],) + tuple(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+        if self.on_done:
+            self.on_done(self)
+
+    @staticmethod
+    def _label(function):
+        filename, first_line, name = function
+        return f"{name} ({os.path.basename(filename)}:{first_line})"
+
+    def function_stats(self):
+        # [(label, self samples, total samples)] sorted by total, then self
+        own, total = {}, {}
+        for stack, count in self.stacks.items():
+            frames = stack[1:]
+            if not frames:
+                continue
+            own[frames[-1]] = own.get(frames[-1], 0) + count
+            for function in set(frames): # Recursion counts once per sample
+                total[function] = total.get(function, 0) + count
+        return sorted(((self._label(function), own.get(function, 0), count) for function, count in total.items()),
+                      key=lambda entry: (-entry[2], -entry[1], entry[0]))
+
+    def write(self, directory, prefix="profile"):
+        # Writes <prefix>_<time>.txt (function report) and .stacks (collapsed stacks for flamegraph.pl or speedscope)
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{prefix}_{datetime.now():%Y%m%d_%H%M%S}")
+        sampled = sum(self.stacks.values()) or 1
+        with open(base + ".txt", 'w', encoding='utf-8') as f:
+            f.write(f"{self.samples} samples every {self.interval * 1000:g} ms of threads: {', '.join(sorted(self.thread_names))}\n\n")
+            f.write(f"{'total':>8} {'self':>8}  function\n")
+            for label, own, total in self.function_stats():
+                f.write(f"{total / sampled:8.1%} {own / sampled:8.1%}  {label}\n")
+        with open(base + ".stacks", 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items(), key=lambda entry: -entry[1]):
+                f.write(";".join([stack[0]] + [self._label(function).replace(";", ":") for function in stack[1:]]) + f" {count}\n")
+        return base + ".txt", base + ".stacks"
+
+class WorkerWatchdog:
+    # Heartbeat supervision for worker loops. Each loop calls beat() once per pass; a loop silent for longer than
+    # stall_multiple x its expected interval (and at least min_stall seconds) is reported and restarted.
+    def __init__(self, stall_multiple=5.0, min_stall=30.0, on_stall=None, on_recover=None):
+        self.stall_multiple = stall_multiple
+        self.min_stall = min_stall
+        self.on_stall = on_stall # on_stall(name, seconds silent)
+        self.on_recover = on_recover # on_recover(name, stall seconds, worker stats)
+        self._workers = {} # name -> {"interval": callable, "restart": callable, "last_beat": float, "stalled": bool}
+        self._stats = {} # name -> {"stalls": int, "stall_seconds": float, "longest_stall": float}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._watch_loop, daemon=True, name="watchdog")
+        self._thread.start()
+
+    def register(self, name, interval, restart):
+        # interval() returns the loop's current expected period in seconds; restart() starts a fresh loop
+        with self._lock:
+            self._workers[name] = {"interval": interval, "restart": restart, "last_beat": time.monotonic(), "stalled": False}
+            self._stats.setdefault(name, {"stalls": 0, "stall_seconds": 0.0, "longest_stall": 0.0})
+
+    def unregister(self, name):
+        with self._lock:
+            self._workers.pop(name, None)
+
+    def beat(self, name):
+        recovered = None
+        with self._lock:
+            worker = self._workers.get(name)
+            if worker is None:
+                return
+            now = time.monotonic()
+            if worker["stalled"]:
+                stall_seconds = now - worker["last_beat"]
+                stats = self._stats[name]
+                stats["stall_seconds"] += stall_seconds
+                stats["longest_stall"] = max(stats["longest_stall"], stall_seconds)
+                worker["stalled"] = False
+                recovered = (stall_seconds, dict(stats))
+            worker["last_beat"] = now
+        if recovered and self.on_recover:
+            self.on_recover(name, *recovered)
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def _watch_loop(self):
+        while True:
+            time.sleep(1.0)
+            stalled = []
+            with self._lock:
+                now = time.monotonic()
+                for name, worker in self._workers.items():
+                    try:
+                        limit = max(self.min_stall, self.stall_multiple * worker["interval"]())
+                    except Exception:
+                        limit = self.min_stall
+                    silent = now - worker["last_beat"]
+                    if not worker["stalled"] and silent > limit:
+                        worker["stalled"] = True
+                        self._stats[name]["stalls"] += 1
+                        stalled.append((name, silent, worker["restart"]))
+            for name, silent, restart in stalled:
+                if self.on_stall:
+                    self.on_stall(name, silent)
+                try:
+                    restart()
+                except Exception:
+                    pass
+
+class StandInWebhookServer:
+    # Local stand-in for a Discord webhook, for exercising delivery, the spool and load tests without Discord.
+    # Post to http://127.0.0.1:<port>/<anything>. It checks payloads the way Discord does (JSON or multipart with
+    # content/payload_json and file parts), answers 204 (200 with a message object for ?wait=true), and can add
+    # latency, random 5xx errors and per-webhook 429 rate limits with retry_after.
+    # fail()/recover() (or POST /__fail?status=503 and /__recover) switch outages on and off.
+    MAX_CONTENT = 2000 # Characters, as on Discord
+    MAX_UPLOAD = 25 * 1024 * 1024
+
+    def __init__(self, host="127.0.0.1", port=0, on_request=None, keep_received=True, latency=0.0, jitter=0.0,
+                 success_status=204, error_rate=0.0, rate_limit=0, rate_window=2.0, seed=None):
+        self.fail_status = None # Status returned for every post while failing, e.g. 503
+        self.latency = latency # Seconds added before every reply
+        self.jitter = jitter # Up to this many extra seconds, uniformly random
+        self.success_status = success_status # 204, or 200 to answer every post as if ?wait=true
+        self.error_rate = error_rate # Share of posts answered with a random 500/502/503
+        self.rate_limit = rate_limit # Posts allowed per webhook path per rate_window seconds, 0 = unlimited
+        self.rate_window = rate_window
+        self.received = [] # {"path", "kind", "content", "files", "bytes"} per accepted post, if keep_received
+        self.received_count = 0
+        self.status_counts = {} # status -> posts answered with it
+        self.keep_received = keep_received
+        self.on_request = on_request
+        self._random = random.Random(seed)
+        self._recent = {} # path -> deque of accepted post times, for rate limiting
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep-alive, like Discord
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                url = urlparse(self.path)
+                if url.path == "/__fail":
+                    stand_in.fail(int(parse_qs(url.query).get("status", ["503"])[0]))
+                    return self._reply(204)
+                if url.path == "/__recover":
+                    stand_in.recover()
+                    return self._reply(204)
+                status, payload, headers = stand_in._respond(url, self.headers.get("Content-Type", ""), body)
+                if stand_in.on_request:
+                    stand_in.on_request(url.path, status, len(body))
+                self._reply(status, payload, headers)
+
+            def _reply(self, status, payload=None, headers=None):
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if data:
+                    self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_port}/webhook"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def fail(self, status=503):
+        self.fail_status = status
+
+    def recover(self):
+        self.fail_status = None
+
+    @staticmethod
+    def parse_payload(content_type, body):
+        # Returns (kind, content, [(filename, size)]) or raises ValueError with Discord's message for a bad body
+        if content_type.startswith("application/json"):
+            message = json.loads(body or b"{}")
+            return "json", message.get("content") or "", []
+        if content_type.startswith("multipart/form-data"):
+            form = BytesParser(policy=email_policy.HTTP).parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+            if not form.is_multipart():
+                raise ValueError("Invalid multipart body")
+            content, files = "", []
+            for part in form.iter_parts():
+                field = part.get_param("name", header="content-disposition")
+                data = part.get_payload(decode=True) or b""
+                if part.get_filename():
+                    files.append((part.get_filename(), len(data)))
+                elif field == "content":
+                    content = data.decode("utf-8")
+                elif field == "payload_json":
+                    content = json.loads(data).get("content") or ""
+            return "multipart", content, files
+        raise ValueError("Unsupported content type")
+
+    def _respond(self, url, content_type, body):
+        # (status, JSON payload or None, extra headers) for one webhook post
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if self.fail_status:
+            return self._count(self.fail_status), None, {}
+        retry_after = None
+        with self._lock:
+            failing = self.error_rate and self._random.random() < self.error_rate
+            error_status = self._random.choice((500, 502, 503)) if failing else None
+            if not failing and self.rate_limit:
+                now = time.monotonic()
+                recent = self._recent.setdefault(url.path, deque())
+                while recent and now - recent[0] >= self.rate_window:
+                    recent.popleft()
+                if len(recent) >= self.rate_limit:
+                    retry_after = self.rate_window - (now - recent[0])
+                else:
+                    recent.append(now)
+        if failing:
+            return self._count(error_status), {"message": "Internal Server Error", "code": 0}, {}
+        if retry_after is not None:
+            return self._count(429), {"message": "You are being rate limited.", "retry_after": round(retry_after, 3), "global": False}, {
+                "Retry-After": str(math.ceil(retry_after)), "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": f"{retry_after:.3f}"}
+        try:
+            kind, content, files = self.parse_payload(content_type, body)
+        except (ValueError, UnicodeDecodeError):
+            return self._count(400), {"message": "Invalid Form Body", "code": 50035}, {}
+        if not content and not files:
+            return self._count(400), {"message": "Cannot send an empty message", "code": 50006}, {}
+        if len(content) > self.MAX_CONTENT:
+            return self._count(400), {"message": "Invalid Form Body", "code": 50035}, {}
+        if sum(size for _, size in files) > self.MAX_UPLOAD:
+            return self._count(413), {"message": "Request entity too large", "code": 40005}, {}
+        with self._lock:
+            self.received_count += 1
+            if self.keep_received:
+                self.received.append({"path": url.path, "kind": kind, "content": content, "files": files, "bytes": len(body)})
+        if self.success_status == 200 or parse_qs(url.query).get("wait", ["false"])[0] == "true":
+            return self._count(200), {"id": str(self.received_count), "content": content,
+                                      "attachments": [{"filename": name, "size": size} for name, size in files]}, {}
+        return self._count(self.success_status), None, {}
+
+    def _count(self, status):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        return status
+
+@dataclass(frozen=True)
+class OcrLine:
+    text: str
+    confidence: float # Mean Tesseract word confidence, 0-100
+    bbox: tuple # (left, top, right, bottom) within the OCR'd image
+
+@dataclass(frozen=True)
+class OcrProfile:
+    # Tesseract settings and preprocessing used for every OCR call; chosen by --tune
+    psm: int = 3 # Page segmentation mode (3 = Tesseract's default, fully automatic)
+    oem: int = 3 # OCR engine mode (3 = default, 1 = LSTM only)
+    whitelist: str = "" # Allowed characters, empty allows everything
+    scale: float = 1.0 # Resize factor applied before OCR
+    threshold: int = 0 # Binarize at this grayscale level (text dark on white) before OCR, 0 = off
+
+    @classmethod
+    def from_config(cls, value):
+        value = value or {}
+        return cls(
+            psm=int(value.get("psm", 3)),
+            oem=int(value.get("oem", 3)),
+            whitelist=str(value.get("whitelist", "")),
+            scale=float(value.get("scale", 1.0)),
+            threshold=int(value.get("threshold", 0))
+        )
+
+    def to_config(self):
+        return {"psm": self.psm, "oem": self.oem, "whitelist": self.whitelist, "scale": self.scale, "threshold": self.threshold}
+
+    def tesseract_config(self, psm=None):
+        options = []
+        if (psm or self.psm) != 3:
+            options.append(f"--psm {psm or self.psm}")
+        if self.oem != 3:
+            options.append(f"--oem {self.oem}")
+        if self.whitelist:
+            options.append(f"-c tessedit_char_whitelist={self.whitelist}")
+        return " ".join(options)
+
+    def prepare(self, image):
+        if self.scale != 1.0:
+            image = image.resize((max(1, round(image.width * self.scale)), max(1, round(image.height * self.scale))), Image.LANCZOS)
+        if self.threshold:
+            image = ImageOps.grayscale(image).point(lambda value: 0 if value >= self.threshold else 255)
+        return image
+
+    def label(self):
+        return (f"psm={self.psm} oem={self.oem} whitelist={'on' if self.whitelist else 'off'} "
+                f"scale={self.scale:g} threshold={self.threshold or 'off'}")
+
+# Characters that appear in the game's notification feed (no quotes: pytesseract splits the config with shlex)
+GAME_TEXT_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789!?.,:;-+()%/"
+
+def read_ocr_lines(image, profile=OcrProfile(), psm=None):
+    # Structured OCR: one OcrLine per Tesseract text line, words joined by single spaces.
+    # Bounding boxes are returned in the coordinates of the image passed in, whatever the profile's scale.
+    data = pytesseract.image_to_data(profile.prepare(image), config=profile.tesseract_config(psm), output_type=pytesseract.Output.DICT)
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        confidence = float(data["conf"][i])
+        if not word or confidence < 0:
+            continue
+        line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        words, confidences, box = lines.setdefault(line_key, ([], [], [data["left"][i], data["top"][i], 0, 0]))
+        words.append(word)
+        confidences.append(confidence)
+        box[0] = min(box[0], data["left"][i])
+        box[1] = min(box[1], data["top"][i])
+        box[2] = max(box[2], data["left"][i] + data["width"][i])
+        box[3] = max(box[3], data["top"][i] + data["height"][i])
+    return [
+        OcrLine(" ".join(words), sum(confidences) / len(confidences), tuple(round(v / profile.scale) for v in box))
+        for words, confidences, box in lines.values()
+    ]
+
+def tune_ocr_profile(corpus_dir, config_file):
+    # Sweep Tesseract settings over labelled captures (image + same-named .txt with the expected text),
+    # print the accuracy/latency Pareto front and store the chosen profile as "ocr_profile" in the config
+    samples = []
+    for name in sorted(os.listdir(corpus_dir)):
+        base, extension = os.path.splitext(name)
+        label_path = os.path.join(corpus_dir, base + ".txt")
+        if extension.lower() in (".png", ".jpg", ".jpeg", ".bmp") and os.path.exists(label_path):
+            with open(label_path, 'r', encoding='utf-8') as f:
+                expected = " ".join(f.read().lower().split())
+            samples.append((name, Image.open(os.path.join(corpus_dir, name)).convert("RGB"), expected))
+    if not samples:
+        print(f"No labelled captures in {corpus_dir} (expected e.g. capture1.png + capture1.txt)")
+        return None
+
+    candidates = [
+        OcrProfile(psm, oem, whitelist, scale, threshold)
+        for psm in (3, 4, 6, 11)
+        for oem in (1, 3)
+        for whitelist in ("", GAME_TEXT_WHITELIST)
+        for scale in (1.0, 1.5, 2.0)
+        for threshold in (0, 150, 200)
+    ]
+    print(f"Evaluating {len(candidates)} profiles on {len(samples)} captures...")
+
+    results = [] # (accuracy, seconds per capture, profile)
+    for index, profile in enumerate(candidates, 1):
+        total_ratio = 0.0
+        started = time.perf_counter()
+        for name, image, expected in samples:
+            try:
+                recognised = " ".join(line.text.lower() for line in read_ocr_lines(image, profile))
+            except Exception as e:
+                print(f"  {profile.label()}: {e}")
+                recognised = ""
+            total_ratio += difflib.SequenceMatcher(None, " ".join(recognised.split()), expected).ratio()
+        results.append((total_ratio / len(samples), (time.perf_counter() - started) / len(samples), profile))
+        print(f"  [{index}/{len(candidates)}] {profile.label()}: accuracy {results[-1][0]:.1%}, {results[-1][1] * 1000:.0f} ms")
+
+    # Pareto front: no other profile is both at least as accurate and at least as fast
+    front = [
+        result for result in results
+        if not any(other[0] >= result[0] and other[1] <= result[1] and (other[0], other[1]) != (result[0], result[1]) for other in results)
+    ]
+    front.sort(key=lambda result: result[1])
+    print("\nAccuracy/latency Pareto front:")
+    for accuracy, seconds, profile in front:
+        print(f"  {accuracy:6.1%}  {seconds * 1000:7.0f} ms  {profile.label()}")
+
+    # The fastest profile within half a point of the best accuracy
+    best_accuracy = max(result[0] for result in front)
+    accuracy, seconds, chosen = next(result for result in front if result[0] >= best_accuracy - 0.005)
+    print(f"\nChosen: {chosen.label()} ({accuracy:.1%}, {seconds * 1000:.0f} ms)")
+
+    config = {}
+    if os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+    config["ocr_profile"] = chosen.to_config()
+    store = ConfigStore(config_file, delay=0)
+    store.update(config, {"ocr_profile"})
+    store.close()
+    print(f"Saved ocr_profile to {config_file}")
+    return chosen
+
+def find_text_bands(image, threshold=200, min_height=6, max_gap=3, padding=3):
+    # Horizontal bands of the image that contain bright (text) pixels, as [(top, bottom)].
+    # Resizing the binarized image to one pixel wide averages each row in C, so this costs ~1 ms.
+    binary = ImageOps.grayscale(image).point(lambda value: 255 if value >= threshold else 0)
+    row_ink = list(binary.resize((1, binary.height), Image.BOX).getdata())
+    bands = []
+    start = None
+    last_ink = None
+    for y, ink in enumerate(row_ink):
+        if ink >= 2: # at least ~1% of the row is text-coloured
+            if start is None:
+                start = y
+            elif y - last_ink > max_gap + 1:
+                bands.append((start, last_ink + 1))
+                start = y
+            last_ink = y
+    if start is not None:
+        bands.append((start, last_ink + 1))
+    return [
+        (max(0, top - padding), min(image.height, bottom + padding))
+        for top, bottom in bands if bottom - top >= min_height
+    ]
+
+def band_hash(band, threshold=200):
+    # Downscaled, binarized fingerprint of a text band; identical text on a changing background hashes the same
+    small = ImageOps.grayscale(band).resize((max(1, band.width // 2), max(1, band.height // 2)), Image.BOX)
+    binary = small.point(lambda value: 255 if value >= threshold else 0).convert("1")
+    return hashlib.blake2b(binary.tobytes() + f"{binary.width}x{binary.height}".encode(), digest_size=16).hexdigest()
+
+@dataclass(frozen=True)
+class ColorMask:
+    # Keeps only pixels within tolerance (per channel) of one of the game's text colours, as white on black.
+    # Every step is a whole-image PIL operation, so a mask costs a few milliseconds per palette colour.
+    palette: tuple # ((r, g, b), ...)
+    tolerance: int = 40
+
+    @classmethod
+    def from_config(cls, config):
+        # None unless the mask is switched on and has at least one colour
+        palette = tuple(tuple(int(channel) for channel in colour[:3]) for colour in config.get("color_mask_palette", []))
+        if not config.get("color_mask_enabled", False) or not palette:
+            return None
+        try:
+            tolerance = int(float(config.get("color_mask_tolerance", "40")))
+        except ValueError:
+            tolerance = 40
+        return cls(palette, max(0, min(255, tolerance)))
+
+    def mask(self, image):
+        # "L" image, 255 where a pixel is near a palette colour
+        image = image.convert("RGB")
+        near_lut = [255 if distance <= self.tolerance else 0 for distance in range(256)]
+        keep = None
+        for colour in self.palette:
+            red, green, blue = ImageChops.difference(image, Image.new("RGB", image.size, colour)).split()
+            near = ImageChops.lighter(red, ImageChops.lighter(green, blue)).point(near_lut) # Largest channel difference
+            keep = near if keep is None else ImageChops.lighter(keep, near)
+        return keep
+
+    def apply(self, image):
+        # (white-on-black text image, fraction of pixels kept); the fraction is a cheap "any text at all" test
+        keep = self.mask(image)
+        return keep.convert("RGB"), keep.histogram()[255] / (keep.width * keep.height)
+
+def learn_color_palette(frames_dir, config_file, max_colours=4):
+    # Find the text colours of the notification feed from sample region captures: colours that are much more common
+    # inside confidently read OCR lines than in the frame as a whole, and that contrast with the line's own
+    # background (the backing plate behind the text). Saves them as the color mask palette.
+    frames = [os.path.join(frames_dir, name) for name in sorted(os.listdir(frames_dir))
+              if os.path.splitext(name)[1].lower() in (".png", ".jpg", ".jpeg", ".bmp")]
+    if not frames:
+        print(f"No captures in {frames_dir}")
+        return None
+
+    config = {}
+    if os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+    profile = OcrProfile.from_config(config.get("ocr_profile"))
+    try:
+        min_confidence = float(config.get("ocr_min_confidence", "60"))
+    except ValueError:
+        min_confidence = 60.0
+
+    # Colours are counted in 32-level bins (3 bits per channel) so anti-aliased shades of one colour pool together
+    text_counts, frame_counts = {}, {}
+    text_pixels = frame_pixels = 0
+    for path in frames:
+        with Image.open(path) as opened:
+            image = ImageOps.posterize(opened.convert("RGB"), 3)
+            lines = [line for line in read_ocr_lines(opened.convert("RGB"), profile) if line.confidence >= min_confidence]
+        for count, colour in image.getcolors(image.width * image.height):
+            frame_counts[colour] = frame_counts.get(colour, 0) + count
+        frame_pixels += image.width * image.height
+        for line in lines:
+            colours = image.crop(line.bbox).getcolors(max(1, (line.bbox[2] - line.bbox[0]) * (line.bbox[3] - line.bbox[1])))
+            if not colours:
+                continue
+            background = max(colours)[1] # The most common colour in a line box is what the text is drawn on
+            for count, colour in colours:
+                if max(abs(channel - plate) for channel, plate in zip(colour, background)) >= 96: # Clearly not background or its blend
+                    text_counts[colour] = text_counts.get(colour, 0) + count
+                    text_pixels += count
+        print(f"  {os.path.basename(path)}: {len(lines)} confident lines")
+    if not text_pixels:
+        print("No confidently read text in the captures; check ocr_region and the OCR profile first")
+        return None
+
+    candidates = []
+    for colour, count in text_counts.items():
+        text_share = count / text_pixels
+        enrichment = text_share / (frame_counts[colour] / frame_pixels)
+        if text_share >= 0.05 and enrichment >= 2.0:
+            candidates.append((text_share * enrichment, colour, text_share, enrichment))
+    candidates.sort(reverse=True)
+    chosen = []
+    for candidate in candidates:
+        # Anti-aliased edges sit between a text colour and the background; skip shades close to a colour already chosen
+        if all(max(abs(a - b) for a, b in zip(candidate[1], other[1])) > 96 for other in chosen):
+            chosen.append(candidate)
+        if len(chosen) == max_colours:
+            break
+    if not chosen:
+        print("No colour stands out inside the text lines; keep the color mask off")
+        return None
+    palette = [[channel + 16 for channel in colour] for score, colour, text_share, enrichment in chosen] # Bin centres
+    for score, colour, text_share, enrichment in chosen:
+        print(f"  text colour ~{tuple(channel + 16 for channel in colour)}: {text_share:.0%} of text pixels, {enrichment:.1f}x more common than in the frame")
+
+    config["color_mask_palette"] = palette
+    config["color_mask_enabled"] = True
+    store = ConfigStore(config_file, delay=0)
+    store.update(config, {"color_mask_palette", "color_mask_enabled"})
+    store.close()
+    print(f"Saved color_mask_palette to {config_file} and switched the color mask on")
+    return palette
+
+class OcrCache:
+    # LRU of OCR results per text-band hash, with hit/miss accounting
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.ocr_seconds = 0.0 # Tesseract time spent on misses
+
+    def get(self, key):
+        with self._lock:
+            lines = self._entries.get(key)
+            if lines is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return lines
+
+    def put(self, key, lines):
+        with self._lock:
+            self._entries[key] = lines
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def add_ocr_time(self, seconds):
+        with self._lock:
+            self.ocr_seconds += seconds
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            average_miss = self.ocr_seconds / self.misses if self.misses else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "ocr_seconds": self.ocr_seconds,
+                "saved_seconds": self.hits * average_miss, # Estimated from the average cost of a miss
+                "entries": len(self._entries)
+            }
+
+@dataclass(frozen=True)
+class DetectionRule:
+    kind: str # "event" or "item"
+    key: str # Config key (event key or item name)
+    name: str # Shown in the GUI and in notifications
+    patterns: tuple # Regexes matched against the lowercase OCR line
+    keywords: tuple # Plain lowercase substrings, matched like patterns
+    cooldown: float # Seconds during which repeat detections are suppressed
+    webhooks: tuple # Destinations: "event", "item", "screenshot", a name from the rules file's "destinations" or a URL
+    group: str = "" # Optional group name that routes can select, e.g. "rare"
+
+@dataclass(frozen=True)
+class DeliveryRoute:
+    # One entry of the rules file's "routes" list. A route selects rules by event key, item name or group
+    # (any of them; none selects every rule) and optionally by item mode, and sends them to its destinations.
+    events: frozenset
+    items: frozenset
+    groups: frozenset
+    modes: frozenset # Item modes ("notify", "silent"); a route with modes never selects events
+    to: tuple
+
+    def matches(self, rule, mode=None):
+        if self.modes and mode not in self.modes:
+            return False
+        if not (self.events or self.items or self.groups):
+            return True
+        return ((rule.kind == "event" and rule.key in self.events) or (rule.kind == "item" and rule.key in self.items)
+                or (bool(rule.group) and rule.group in self.groups))
+
+class CombinedMatcher:
+    # Rules are still searched one by one, but only on lines that a single regex built from all of them says mention
+    # at least one, so the many lines that mention none cost one pass. A pattern that cannot share that regex (inline
+    # flags such as "(?i)", named groups, backreferences) leaves its rule out of it, to be searched on every line.
+    SHARED_ONLY = re.compile(r"\\[1-9]|\(\?P[<=]|\(\?[aiLmsux]+\)")
+
+    def __init__(self, rules):
+        self.rules = [] # (rule, [compiled pattern or keyword regex], shareable)
+        shared = []
+        for rule in rules:
+            regexes = [re.compile(pattern) for pattern in rule.patterns] + [re.compile(re.escape(keyword)) for keyword in rule.keywords]
+            if not regexes:
+                continue
+            shareable = not any(self.SHARED_ONLY.search(pattern) for pattern in rule.patterns)
+            if shareable:
+                shared.extend(regex.pattern for regex in regexes)
+            self.rules.append((rule, regexes, shareable))
+        self.prefilter = None
+        if shared:
+            try:
+                self.prefilter = re.compile("|".join(f"(?:{source})" for source in shared))
+            except re.error: # Anything else that cannot be combined: search every rule on every line
+                self.rules = [(rule, regexes, False) for rule, regexes, shareable in self.rules]
+
+    def find(self, text_lower):
+        # [(rule, match)] in line order, at most once per rule; every rule that matches is returned, as if each
+        # had been searched alone
+        check_shared = self.prefilter is not None and self.prefilter.search(text_lower) is not None
+        found = []
+        for index, (rule, regexes, shareable) in enumerate(self.rules):
+            if shareable and not check_shared:
+                continue
+            matches = [match for match in (regex.search(text_lower) for regex in regexes) if match is not None]
+            if matches:
+                match = min(matches, key=lambda match: match.start())
+                found.append((match.start(), index, rule, match))
+        return [(rule, match) for start, index, rule, match in sorted(found, key=lambda entry: entry[:2])]
+
+def plural_form(phrase):
+    # English plural of a phrase's last word: "gold egg" -> "gold eggs", "blueberry" -> "blueberries"
+    head, _, last = phrase.rpartition(" ")
+    if last.endswith("s"):
+        return phrase # Already plural, or a name like "gumdrops"
+    if last.endswith(("x", "ch", "sh", "z")):
+        last += "es"
+    elif last.endswith("y") and len(last) > 1 and last[-2] not in "aeiou":
+        last = last[:-1] + "ies"
+    else:
+        last += "s"
+    return f"{head} {last}" if head else last
+
+class ItemParser:
+    # Reads item drops and their quantities from a line in one pass over its words. Every item's keywords and their
+    # plurals are indexed as word sequences, and at each word the longest known sequence wins, so "gold eggs" is
+    # Gold Egg and never also Egg, even when Gold Egg itself is switched off. Items with regex patterns in the rules
+    # file are matched by pattern instead, with a quantity of 1.
+    TOKEN = re.compile(r"[a-z]+|\d[\d,]*")
+
+    def __init__(self, rules, enabled):
+        self.enabled = enabled # Item names whose drops are reported
+        self.index = {} # (word, ...) -> DetectionRule, for every item so longer names shadow shorter ones
+        for forms in ((lambda keyword: keyword), plural_form): # Real keywords claim a word sequence before plurals do
+            for rule in rules:
+                for keyword in rule.keywords:
+                    words = tuple(self.TOKEN.findall(forms(keyword)))
+                    if words:
+                        self.index.setdefault(words, rule)
+        self.longest = max((len(words) for words in self.index), default=0)
+        self.pattern_matcher = CombinedMatcher([replace(rule, keywords=()) for rule in rules if rule.patterns and rule.key in enabled])
+
+    def parse(self, text_lower):
+        # [(rule, quantity)] in line order, one entry per item with repeated mentions added up
+        tokens = self.TOKEN.findall(text_lower.replace("×", " x "))
+        found = {}
+        position = 0
+        floor = 0 # Words before this belong to an earlier item, including its "x3"
+        while position < len(tokens):
+            for length in range(min(self.longest, len(tokens) - position), 0, -1):
+                rule = self.index.get(tuple(tokens[position:position + length]))
+                if rule:
+                    break
+            else:
+                position += 1
+                continue
+            quantity, position = self._quantity(tokens, position, position + length, floor)
+            if rule.key in self.enabled:
+                found[rule.key] = (rule, found[rule.key][1] + quantity if rule.key in found else quantity)
+            floor = position
+        for rule, match in self.pattern_matcher.find(text_lower):
+            found.setdefault(rule.key, (rule, 1))
+        return list(found.values())
+
+    @staticmethod
+    def _quantity(tokens, start, end, floor):
+        # (quantity, position after the item and any trailing count) for "+3 blueberries", "x25 treats", "3x treat"
+        # or "treat x3"; the quantity is 1 when no count is shown
+        def number(token):
+            try:
+                return int(token.replace(",", "")) if token[0].isdigit() else None
+            except ValueError:
+                return None
+        if start - 1 >= floor and number(tokens[start - 1]):
+            return number(tokens[start - 1]), end
+        if start - 2 >= floor and tokens[start - 1] == "x" and number(tokens[start - 2]):
+            return number(tokens[start - 2]), end
+        if end + 1 < len(tokens) and tokens[end] == "x" and number(tokens[end + 1]):
+            return number(tokens[end + 1]), end + 2
+        return 1, end
+
+class DetectionRules:
+    # Event and item definitions loaded from the external rules file (bssn_rules.json)
+    SLOTS = ("event", "item", "screenshot") # The webhooks set on the Webhooks tab
+
+    def __init__(self, events, items, destinations=None, routes=()):
+        self.events = events # {event_key: DetectionRule}, in file order
+        self.items = items # {item_name: DetectionRule}
+        self.destinations = destinations or {} # {name: webhook URL}
+        self.routes = tuple(routes) # DeliveryRoute, first match wins
+
+    def destinations_for(self, rule, mode=None):
+        # Destination names or URLs for one detection: the first matching route, else the rule's own webhooks
+        for route in self.routes:
+            if route.matches(rule, mode):
+                return route.to
+        return rule.webhooks
+
+    @classmethod
+    def load(cls, path):
+        # Raises ValueError describing the first problem, so a bad edit never replaces working rules
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                document = json.load(f)
+            except ValueError as e:
+                raise ValueError(f"{path} is not valid JSON: {e}")
+        return cls.from_document(document)
+
+    @classmethod
+    def from_document(cls, document):
+        events = {}
+        for key, spec in document.get("events", {}).items():
+            events[key] = cls._parse_rule("event", key, spec, default_webhook="event", default_cooldown=10)
+            if not events[key].patterns and not events[key].keywords:
+                raise ValueError(f"Event '{key}' needs at least one pattern or keyword")
+        items = {}
+        for name, spec in document.get("items", {}).items():
+            rule = cls._parse_rule("item", name, spec, default_webhook="item", default_cooldown=0)
+            if not rule.patterns and not rule.keywords:
+                rule = replace(rule, keywords=(name.lower(),))
+            items[name] = rule
+        destinations = {}
+        for name, url in document.get("destinations", {}).items():
+            if name in cls.SLOTS or not isinstance(url, str) or not url.startswith(("http://", "https://")):
+                raise ValueError(f"Destination '{name}' needs a webhook URL and a name other than {', '.join(cls.SLOTS)}")
+            destinations[name] = url.strip()
+        routes = [cls._parse_route(index, spec, events, items) for index, spec in enumerate(document.get("routes", []), 1)]
+        for rule in list(events.values()) + list(items.values()):
+            cls._check_destinations(f"{rule.kind} '{rule.key}'", rule.webhooks, destinations)
+        for index, route in enumerate(routes, 1):
+            cls._check_destinations(f"route {index}", route.to, destinations)
+        return cls(events, items, destinations, routes)
+
+    @staticmethod
+    def _parse_route(index, spec, events, items):
+        def names(field):
+            value = spec.get(field, [])
+            return [value] if isinstance(value, str) else list(value)
+        route = DeliveryRoute(frozenset(names("events")), frozenset(names("items")), frozenset(names("groups")),
+                              frozenset(names("modes")), tuple(dict.fromkeys(names("to"))))
+        unknown = sorted(route.events - set(events)) + sorted(route.items - set(items))
+        if unknown:
+            raise ValueError(f"Route {index} names unknown events or items: {', '.join(unknown)}")
+        if route.modes - {"notify", "silent"}:
+            raise ValueError(f"Route {index} has modes other than notify and silent")
+        if not route.to:
+            raise ValueError(f"Route {index} needs at least one destination in \"to\"")
+        return route
+
+    @classmethod
+    def _check_destinations(cls, owner, targets, destinations):
+        for target in targets:
+            if target not in cls.SLOTS and target not in destinations and not target.startswith(("http://", "https://")):
+                raise ValueError(f"Unknown destination '{target}' for {owner}")
+
+    @staticmethod
+    def _parse_rule(kind, key, spec, default_webhook, default_cooldown):
+        patterns = tuple(spec.get("patterns", []))
+        webhook = spec.get("webhook", default_webhook) # One destination or a list of them
+        for pattern in patterns:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Bad pattern for {kind} '{key}': {pattern!r} ({e})")
+        return DetectionRule(
+            kind=kind,
+            key=key,
+            name=spec.get("name", key),
+            patterns=patterns,
+            keywords=tuple(keyword.lower() for keyword in spec.get("keywords", [])),
+            cooldown=float(spec.get("cooldown", default_cooldown)),
+            webhooks=tuple(webhook) if isinstance(webhook, list) else (webhook,),
+            group=spec.get("group", "")
+        )
+
+    @staticmethod
+    def default_document(event_definitions, event_patterns, item_names):
+        # The built-in rules, written out when no rules file exists yet
+        return {
+            "events": {
+                key: {"name": name, "patterns": [event_patterns[key]], "keywords": [], "cooldown": 10, "webhook": "event"}
+                for key, name in event_definitions.items()
+            },
+            "items": {
+                name: {"keywords": [name.lower()], "cooldown": 0, "webhook": "item"}
+                for name in item_names
+            }
+        }
+
+@dataclass(frozen=True)
+class DetectionSettings:
+    # Immutable snapshot of everything the worker threads need.
+    # The GUI publishes a new one whenever the config changes; workers just read self.settings.
+    event_webhook: str
+    item_webhook: str
+    screenshot_webhook: str
+    screenshot_enabled: bool
+    scan_interval: float
+    full_screenshot_interval: float
+    full_screenshot_busy_policy: str # "skip" or "replace" a tick that finds the previous upload still going
+    ocr_region: tuple
+    rules: DetectionRules
+    event_matcher: CombinedMatcher # Enabled events only
+    item_parser: ItemParser # Reports items that are not "off"
+    item_modes: dict # {item_name: mode} for items that are not "off"
+    item_digest_enabled: bool
+    item_digest_window: float # seconds
+    attachment_mode: str # "crop" (matched line only) or "full" (whole OCR region)
+    crop_margin: int # pixels kept around the matched line
+    crop_upscale: float # 1 keeps the crop at capture size
+    ocr_min_confidence: float # Lines below this mean word confidence are retried or dropped
+    ocr_retry_low_confidence: bool
+    ocr_band_threshold: int # Grayscale level counted as text when splitting the region into line bands
+    ocr_profile: OcrProfile
+    color_mask: ColorMask # None when off
+    color_mask_min_ink: float # fraction of the region
+
+    @classmethod
+    def from_config(cls, config, rules):
+        def parse_interval(value):
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                return 3.0
+
+        item_modes = {
+            item_name: mode
+            for item_name, mode in config["items"].items()
+            if mode != "off" and item_name in rules.items
+        }
+        return cls(
+            event_webhook=config.get("event_webhook", "").strip(),
+            item_webhook=config.get("item_webhook", "").strip(),
+            screenshot_webhook=config.get("screenshot_webhook", "").strip(),
+            screenshot_enabled=bool(config.get("screenshot_enabled", True)),
+            scan_interval=parse_interval(config.get("scan_interval", "3")),
+            full_screenshot_interval=parse_interval(config.get("full_screenshot_interval", "3")),
+            full_screenshot_busy_policy=config.get("full_screenshot_busy_policy", "skip"),
+            ocr_region=tuple(config.get("ocr_region", (1300, 675, 1820, 1080))),
+            rules=rules,
+            event_matcher=CombinedMatcher([rule for key, rule in rules.events.items() if config["events"].get(key, False)]),
+            item_parser=ItemParser(list(rules.items.values()), set(item_modes)),
+            item_modes=item_modes,
+            item_digest_enabled=bool(config.get("item_digest_enabled", False)),
+            item_digest_window=max(60.0, parse_interval(config.get("item_digest_window", "15")) * 60),
+            attachment_mode=config.get("attachment_mode", "crop"),
+            crop_margin=int(parse_interval(config.get("crop_margin", "12"))),
+            crop_upscale=max(1.0, parse_interval(config.get("crop_upscale", "2"))),
+            ocr_min_confidence=parse_interval(config.get("ocr_min_confidence", "60")),
+            ocr_retry_low_confidence=bool(config.get("ocr_retry_low_confidence", True)),
+            ocr_band_threshold=int(parse_interval(config.get("ocr_band_threshold", "200"))),
+            ocr_profile=OcrProfile.from_config(config.get("ocr_profile")),
+            color_mask=ColorMask.from_config(config),
+            color_mask_min_ink=parse_interval(config.get("color_mask_min_ink", "0.05")) / 100
+        )
+
+class BeeSwarmNotifier:
+    START_WAIT = 10 # Seconds a start waits for the previous run's threads before starting without them
+    
+    def __init__(self, headless=False, log_sink=print):
+        # headless builds the detection pipeline without any window, for the soak test; log lines go to log_sink
+        self.root = None
+        self.log_sink = log_sink
+        self.clock = time.time # Cooldown clock; the soak test swaps in simulated time
+        if not headless:
+            self.root = tk.Tk()
+            self.root.title("Bee Swarm Smart Notifier v1.1")
+            self.root.geometry("550x400") # Slightly increased size
+            self.root.resizable(False, False)
+            self.root.overrideredirect(True)
         
         # Store window position for dragging
         self._x = 0
@@ -41,10 +1881,60 @@ class BeeSwarmNotifier:
             "start_hotkey": "f7",  # Default start hotkey
             "stop_hotkey": "f8",   # Default stop hotkey
             "scan_interval": "3",
+            "capture_buffer_size": "4", # Captured frames waiting for OCR before the oldest is dropped
+            "capture_policy": "latest", # "latest" OCRs only the newest frame, "drop_oldest" OCRs frames in order
+            "alert_clip_enabled": False, # Attach a clip of the seconds around an event instead of one screenshot
+            "alert_clip_pre_seconds": "3",
+            "alert_clip_post_seconds": "2", # The event alert waits this long before it is posted
+            "alert_clip_frame_interval": "0.5", # Region captures kept for clips, seconds apart
+            "alert_clip_burst_interval": "0.2", # Capture rate right after an event matched
+            "alert_clip_max_mb": "20", # Memory cap for the buffered frames
+            "alert_clip_format": "webp", # "webp" or "gif" clip, or "grid" frame strip
             "screenshot_webhook": "", # New screenshot webhook
             "full_screenshot_interval": "3", # New full screenshot interval
+            "full_screenshot_busy_policy": "skip", # Tick during an upload: "skip" it, or "replace" the frame waiting to go
+            "full_screenshot_mode": "single", # "single" posts every frame, "timelapse" batches them into one post
+            "timelapse_format": "webp", # "webp" or "gif" animation, or "grid" contact sheet
+            "timelapse_frames": "10", # Frames per time-lapse post
+            "timelapse_seconds": "60", # Post a time-lapse at least this often, even with fewer frames
+            "timelapse_max_width": "640", # Frames are downscaled to this width as they are captured
             "start_full_screenshot_hotkey": "f9", # New start full screenshot hotkey
             "stop_full_screenshot_hotkey": "f10", # New stop full screenshot hotkey
+            "config_save_delay": "0.5", # Seconds to coalesce config changes before writing to disk
+            "ocr_region": [1300, 675, 1820, 1080], # Screen area scanned for game text (left, top, right, bottom)
+            "rules_file": "bssn_rules.json", # Event and item detection rules, reloaded when the file changes
+            "journal_enabled": True, # Keep a local SQLite history of detections
+            "journal_file": "bee_swarm_journal.db",
+            "journal_retention_days": "0", # 0 keeps detections forever
+            "item_digest_enabled": False, # Batch silent item drops into one summary message per window
+            "item_digest_window": "15", # Digest window in minutes
+            "attachment_mode": "crop", # "crop" attaches only the matched line, "full" the whole OCR region
+            "crop_margin": "12", # Pixels kept around the matched line
+            "crop_upscale": "2", # Enlarge the crop for readability (1 = off)
+            "ocr_min_confidence": "60", # Drop OCR lines whose mean word confidence is below this (0-100)
+            "ocr_retry_low_confidence": True, # Re-read low-confidence lines once, enlarged, before dropping them
+            "ocr_cache_size": "256", # Text-line bands whose OCR result is remembered (0 = OCR every scan)
+            "ocr_band_threshold": "200", # Grayscale level counted as text when finding line bands
+            "ocr_profile": OcrProfile().to_config(), # Tesseract settings; python BSSN-V1.1.py --tune <captures> picks these
+            "color_mask_enabled": False, # OCR only pixels in the text colours below; --learn-palette <captures> sets these
+            "color_mask_palette": [[255, 255, 255]],
+            "color_mask_tolerance": "40", # Per-channel distance from a palette colour still counted as text
+            "color_mask_min_ink": "0.05", # Percent of the region in text colours below which OCR is skipped
+            "http_connect_timeout": "5", # Seconds to establish a connection to a webhook
+            "http_read_timeout": "15", # Seconds to wait for a webhook's response
+            "http_max_concurrent_per_webhook": "2",
+            "delivery_queue_size": "100", # Notifications waiting per destination before new ones go to the spool
+            "profile_enabled": False, # Sample detection and Live Feed threads when either starts
+            "profile_seconds": "60", # How long each profiling run lasts
+            "profile_interval_ms": "10", # Time between stack samples
+            "profile_dir": "bssn_profiles", # Where reports and collapsed-stack files are written
+            "watchdog_stall_multiple": "5", # A worker silent for this many intervals is restarted
+            "watchdog_min_stall_seconds": "30", # ...but never sooner than this
+            "watchdog_webhook": "", # Optional webhook for stall alerts
+            "spool_enabled": True, # Keep undelivered notifications on disk and resend them later
+            "spool_dir": "bssn_spool",
+            "spool_max_mb": "50",
+            "spool_max_age_hours": "24",
             "events": {
                 "puffshroom": False,
                 "sprout": False,
@@ -58,7 +1948,7 @@ class BeeSwarmNotifier:
             "items": {}
         }
         
-        # Event definitions
+        # Built-in event definitions, used to write the default rules file
         self.event_definitions = {
             "puffshroom": "Puffshroom spawned (May be broken)",
             "sprout": "Sprout / Party Sprout",
@@ -70,6 +1960,18 @@ class BeeSwarmNotifier:
             "stick_bug": "Stick Bug Challenge"
         }
         
+        # Built-in regexes matched against the lowercase OCR text for each event
+        self.event_patterns = {
+            "puffshroom": r"puffshroom.*spawn",
+            "sprout": r"a .* sprout has appeared.*|.* has planted .* sprout.*",
+            "meteor_shower": r"meteor.*shower",
+            "honey_storm": r"a honeystorm has been summoned!|.* has summoned a honeystorm!",
+            "windy_bee": r"found a windy bee",
+            "vicious_bee": r"vicious bee is attacking",
+            "mondo_chicken": r"mondo chick has spawned.*",
+            "stick_bug": r"started the stick bug challenge.*"
+        }
+        
         # Common Bee Swarm items
         self.bee_swarm_items = sorted(list(set([
             "Aged Gingerbread Bear", "Atomic Treat", "Bitterberry", "Blackberry", "Blue Extract", "Blueberry",
@@ -87,38 +1989,144 @@ class BeeSwarmNotifier:
         # Detection state
         self.detection_running = False
         self.detection_thread = None
+        self.capture_thread = None
+        self.frame_ring = FrameRing()
+        self.frame_history = None # FrameHistory while detection runs with alert clips on
+        self.event_clips = [] # (thread, hurry event) per event clip still waiting for its post-event frames
+        self.event_clips_lock = threading.Lock()
+        self.detection_stop = threading.Event() # Set by stop_detection; the loop waits on it instead of sleeping
+        self.detection_start_job = None # Pending start while the previous loop finishes its last pass
+        self.start_deadlines = {} # {"Detection"/"Live Feed": monotonic time a pending start stops waiting}
         self.start_hotkey_bound = False
         self.stop_hotkey_bound = False
         self.last_notification_time = {} # Stores last time a notification was sent: {("event"/"item", name): timestamp}
-        self.COOLDOWN_TIME = 10 # seconds for double detection warning
+        
+        # Profiling state
+        self.profiler = None
         
         # Full screenshot state
         self.full_screenshot_running = False
         self.full_screenshot_thread = None
+        self.full_screenshot_upload_thread = None
+        self.full_screenshot_ring = FrameRing(1, "latest") # Replaced on every start
+        self.full_screenshot_timelapse = None # TimeLapse while running in time-lapse mode
+        self.full_screenshot_uploading = threading.Event()
+        self.full_screenshot_stats = {}
+        self.full_screenshot_stop = threading.Event()
+        self.full_screenshot_start_job = None
         self.start_full_screenshot_hotkey_bound = False
         self.stop_full_screenshot_hotkey_bound = False
         
+        # Item list state
+        self.item_mode_display = {"off": "🚫 Off", "silent": "📤 Silent", "notify": "🔔 Notify"}
+        self.item_rows = {} # {item_name: treeview row id}
+        self.item_names_by_row = {} # {treeview row id: item_name}
+        self.item_search_index = [] # [(lowercase name, row id)] in display order
+        self.visible_item_rows = set()
+        self.item_filter_job = None
+        self.ITEM_SEARCH_DEBOUNCE_MS = 150 # wait for a pause in typing before filtering
+        
         # Load configuration
         self.load_config()
+        try:
+            config_save_delay = float(self.config.get("config_save_delay", "0.5"))
+        except ValueError:
+            config_save_delay = 0.5
+        self.config_store = ConfigStore(self.config_file, config_save_delay, on_error=self._on_config_write_error)
         
-        # Initialize GUI
-        self.setup_gui()
+        # Detection rules
+        self.rules_file = self.config.get("rules_file", "bssn_rules.json")
+        self.rules_mtime = None
+        self.rules = self.load_rules()
+        self.publish_settings()
         
-        # Apply theme
-        self.apply_theme()
-
-        # Define a tiny font style for the close button
-        style = ttk.Style()
-        style.configure('Tiny.TButton', font=('Arial', 6))
+        # Detection journal
+        self.journal = None
+        if self.config.get("journal_enabled", True):
+            try:
+                retention_days = float(self.config.get("journal_retention_days", "0"))
+            except ValueError:
+                retention_days = 0
+            self.journal = DetectionJournal(self.config.get("journal_file", "bee_swarm_journal.db"), retention_days, on_error=self._on_journal_error)
+        
+        # OCR result cache
+        try:
+            ocr_cache_size = int(self.config.get("ocr_cache_size", "256"))
+        except ValueError:
+            ocr_cache_size = 256
+        self.ocr_cache = OcrCache(ocr_cache_size) if ocr_cache_size > 0 else None
+        self.last_ocr_cache_report = time.time()
+        
+        # Capture-to-delivery latency per detection
+        self.latency = LatencyTracker()
+        
+        # Shared HTTP client for every webhook request
+        try:
+            self.http = WebhookClient(float(self.config.get("http_connect_timeout", "5")),
+                                      float(self.config.get("http_read_timeout", "15")),
+                                      int(self.config.get("http_max_concurrent_per_webhook", "2")))
+        except ValueError:
+            self.http = WebhookClient()
+        
+        # One delivery queue per destination, so routed notifications fan out concurrently
+        try:
+            self.outbox = DestinationQueues(max(1, int(self.config.get("delivery_queue_size", "100"))), self._on_delivery_error)
+        except ValueError:
+            self.outbox = DestinationQueues(on_error=self._on_delivery_error)
         
-        # Define a larger font style for event checkboxes
-        style.configure('EventCheckbutton.TCheckbutton', font=('Arial', 12))
+        # Outbound spool for notifications that could not be delivered
+        self.spool = None
+        if self.config.get("spool_enabled", True):
+            try:
+                spool_max_bytes = float(self.config.get("spool_max_mb", "50")) * 1024 * 1024
+                spool_max_age = float(self.config.get("spool_max_age_hours", "24")) * 3600
+            except ValueError:
+                spool_max_bytes, spool_max_age = 50 * 1024 * 1024, 24 * 3600
+            try:
+                self.spool = OutboundSpool(self.config.get("spool_dir", "bssn_spool"), self._post_webhook,
+                                           spool_max_bytes, spool_max_age, on_result=self._on_spool_result)
+            except Exception as e:
+                self.log_status(f"Outbound spool disabled: {str(e)}")
+        
+        if not headless:
+            # Initialize GUI
+            self.setup_gui()
+            
+            # Apply theme
+            self.apply_theme()
 
-        # Apply always on top setting on startup
-        self.apply_always_on_top()
+            # Define a tiny font style for the close button
+            style = ttk.Style()
+            style.configure('Tiny.TButton', font=('Arial', 6))
+            
+            # Define a larger font style for event checkboxes
+            style.configure('EventCheckbutton.TCheckbutton', font=('Arial', 12))
 
-        # Bind hotkeys
-        self.bind_hotkeys()
+            # Apply always on top setting on startup
+            self.apply_always_on_top()
+
+            # Bind hotkeys
+            self.bind_hotkeys()
+        
+        # Worker supervision
+        self.worker_generations = {} # {worker name: generation}; a loop keeps running only while it is the current one
+        try:
+            stall_multiple = float(self.config.get("watchdog_stall_multiple", "5"))
+            min_stall = float(self.config.get("watchdog_min_stall_seconds", "30"))
+        except ValueError:
+            stall_multiple, min_stall = 5.0, 30.0
+        self.watchdog = WorkerWatchdog(stall_multiple, min_stall, on_stall=self._on_worker_stall, on_recover=self._on_worker_recover)
+        
+        # Reload the rules file whenever it changes
+        self.watchdog.register("rules", lambda: 2.0, lambda: self.start_worker("rules", self.rules_watch_loop))
+        self.rules_watch_thread = self.start_worker("rules", self.rules_watch_loop)
+        
+        # Silent item digest
+        self.item_digest = ItemDigest()
+        self.item_digest_wakeup = threading.Event()
+        self.item_digest_flush = False # Set with the wakeup to post the partial window; a bare wakeup re-times the window
+        self.watchdog.register("digest", lambda: self.settings.item_digest_window, lambda: self.start_worker("digest", self.item_digest_loop))
+        self.item_digest_thread = self.start_worker("digest", self.item_digest_loop)
 
     def setup_gui(self):
         # Create control buttons and the top bar container (which will be at the bottom)
@@ -158,6 +2166,7 @@ class BeeSwarmNotifier:
         self.event_webhook_var = tk.StringVar(value=self.config.get("event_webhook", ""))
         self.event_webhook_entry = ttk.Entry(webhook_frame, textvariable=self.event_webhook_var, width=80, show='*')
         self.event_webhook_entry.pack(fill="x", padx=5, pady=2)
+        self.event_webhook_var.trace("w", self.save_config)
         
         test_button = ttk.Button(webhook_frame, text="Send Test Event", command=self.test_event_webhook)
         test_button.pack(anchor="w", padx=5, pady=2)
@@ -183,13 +2192,24 @@ class BeeSwarmNotifier:
         canvas.bind("<Configure>", lambda e: canvas.itemconfigure(canvas.winfo_children()[0], width=e.width))
         
         # Event checkboxes
+        self.events_list_frame = scrollable_frame
+        self.populate_events_list()
+        
+        canvas.pack(fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+    
+    def populate_events_list(self):
+        # (Re)build one checkbox per event rule; called again when the rules file changes
+        for child in self.events_list_frame.winfo_children():
+            child.destroy()
+        
         self.event_vars = {}
         row_idx = 0
         col_idx = 0
-        for event_key, event_name in self.event_definitions.items():
+        for event_key, rule in self.rules.events.items():
             var = tk.BooleanVar(value=self.config["events"].get(event_key, False))
             self.event_vars[event_key] = var
-            cb = ttk.Checkbutton(scrollable_frame, text=event_name, variable=var, command=self.save_config, style='EventCheckbutton.TCheckbutton')
+            cb = ttk.Checkbutton(self.events_list_frame, text=rule.name, variable=var, command=self.save_config, style='EventCheckbutton.TCheckbutton')
             cb.grid(row=row_idx, column=col_idx, sticky="ew", padx=15, pady=10)
             
             col_idx += 1
@@ -198,15 +2218,12 @@ class BeeSwarmNotifier:
                 row_idx += 1
 
         # Configure column weights to make them expand
-        scrollable_frame.grid_columnconfigure(0, weight=1)
-        scrollable_frame.grid_columnconfigure(1, weight=1)
+        self.events_list_frame.grid_columnconfigure(0, weight=1)
+        self.events_list_frame.grid_columnconfigure(1, weight=1)
         
         # Configure row weights (optional, but good for vertical expansion if needed)
         for i in range(row_idx + 1): # Ensure all rows expand if space is available
-            scrollable_frame.grid_rowconfigure(i, weight=1)
-        
-        canvas.pack(fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+            self.events_list_frame.grid_rowconfigure(i, weight=1)
     
     def create_items_tab(self):
         self.items_frame = ttk.Frame(self.notebook)
@@ -220,6 +2237,7 @@ class BeeSwarmNotifier:
         self.item_webhook_var = tk.StringVar(value=self.config.get("item_webhook", ""))
         self.item_webhook_entry = ttk.Entry(webhook_frame, textvariable=self.item_webhook_var, width=80, show='*')
         self.item_webhook_entry.pack(fill="x", padx=5, pady=2)
+        self.item_webhook_var.trace("w", self.save_config)
         
         test_button = ttk.Button(webhook_frame, text="Send Test Drop", command=self.test_item_webhook)
         test_button.pack(anchor="w", padx=5, pady=2)
@@ -303,6 +2321,7 @@ class BeeSwarmNotifier:
         self.screenshot_webhook_var = tk.StringVar(value=self.config.get("screenshot_webhook", ""))
         self.screenshot_webhook_entry = ttk.Entry(webhook_frame, textvariable=self.screenshot_webhook_var, width=80, show='*')
         self.screenshot_webhook_entry.pack(fill="x", padx=5, pady=2)
+        self.screenshot_webhook_var.trace("w", self.save_config)
         
         test_button = ttk.Button(webhook_frame, text="Send Test Screenshot", command=self.test_screenshot_webhook)
         test_button.pack(anchor="w", padx=5, pady=2)
@@ -316,6 +2335,42 @@ class BeeSwarmNotifier:
         full_screenshot_interval_spin = ttk.Spinbox(interval_frame, from_=0.1, to=30, textvariable=self.full_screenshot_interval_var, width=10, increment=0.1)
         full_screenshot_interval_spin.pack(side="left", padx=10, pady=2)
         self.full_screenshot_interval_var.trace("w", self.save_config)
+        
+        ttk.Label(interval_frame, text="While uploading:").pack(side="left", padx=5, pady=2)
+        self.full_screenshot_busy_policy_var = tk.StringVar(value=self.config.get("full_screenshot_busy_policy", "skip"))
+        busy_policy_combo = ttk.Combobox(interval_frame, textvariable=self.full_screenshot_busy_policy_var, values=["skip", "replace"], state="readonly", width=8)
+        busy_policy_combo.pack(side="left", padx=5, pady=2)
+        busy_policy_combo.bind("<<ComboboxSelected>>", self.save_config)
+        
+        # Time-lapse settings
+        timelapse_frame = ttk.LabelFrame(scrollable_frame, text="Time-lapse")
+        timelapse_frame.pack(fill="x", padx=10, pady=5)
+        
+        mode_row = ttk.Frame(timelapse_frame)
+        mode_row.pack(fill="x", padx=5, pady=2)
+        ttk.Label(mode_row, text="Mode:").pack(side="left", padx=5)
+        self.full_screenshot_mode_var = tk.StringVar(value=self.config.get("full_screenshot_mode", "single"))
+        mode_combo = ttk.Combobox(mode_row, textvariable=self.full_screenshot_mode_var, values=["single", "timelapse"], state="readonly", width=10)
+        mode_combo.pack(side="left", padx=5)
+        mode_combo.bind("<<ComboboxSelected>>", self.save_config)
+        ttk.Label(mode_row, text="Format:").pack(side="left", padx=5)
+        self.timelapse_format_var = tk.StringVar(value=self.config.get("timelapse_format", "webp"))
+        format_combo = ttk.Combobox(mode_row, textvariable=self.timelapse_format_var, values=list(TimeLapse.FORMATS), state="readonly", width=8)
+        format_combo.pack(side="left", padx=5)
+        format_combo.bind("<<ComboboxSelected>>", self.save_config)
+        
+        batch_row = ttk.Frame(timelapse_frame)
+        batch_row.pack(fill="x", padx=5, pady=2)
+        ttk.Label(batch_row, text="Post every").pack(side="left", padx=5)
+        self.timelapse_frames_var = tk.StringVar(value=self.config.get("timelapse_frames", "10"))
+        ttk.Spinbox(batch_row, from_=2, to=100, textvariable=self.timelapse_frames_var, width=5).pack(side="left")
+        self.timelapse_frames_var.trace("w", self.save_config)
+        ttk.Label(batch_row, text="frames or").pack(side="left", padx=5)
+        self.timelapse_seconds_var = tk.StringVar(value=self.config.get("timelapse_seconds", "60"))
+        ttk.Spinbox(batch_row, from_=5, to=3600, textvariable=self.timelapse_seconds_var, width=6, increment=5).pack(side="left")
+        self.timelapse_seconds_var.trace("w", self.save_config)
+        ttk.Label(batch_row, text="seconds").pack(side="left", padx=5)
+        ttk.Label(timelapse_frame, text="Changes apply the next time the Live Feed starts", font=("Arial", 8)).pack(anchor="w", padx=10, pady=2)
 
         # Screenshot hotkey settings
         hotkey_frame = ttk.LabelFrame(scrollable_frame, text="Screenshot Hotkey Settings") # Parent changed
@@ -373,6 +2428,17 @@ class BeeSwarmNotifier:
         )
         screenshot_cb.pack(anchor="w", padx=10, pady=5)
         
+        # Attachment crop setting
+        attachment_frame = ttk.Frame(settings_container)
+        attachment_frame.pack(anchor="w", padx=10, pady=5)
+        
+        ttk.Label(attachment_frame, text="Alert Screenshot:").pack(side="left", padx=5)
+        self.attachment_mode_var = tk.StringVar(value=self.config.get("attachment_mode", "crop"))
+        attachment_combo = ttk.Combobox(attachment_frame, textvariable=self.attachment_mode_var, values=["crop", "full"], state="readonly", width=8)
+        attachment_combo.pack(side="left", padx=5)
+        attachment_combo.bind("<<ComboboxSelected>>", self.save_config)
+        ttk.Label(attachment_frame, text="(crop = matched line only)", font=("Arial", 8)).pack(side="left", padx=5)
+        
         # Always on top setting
         self.always_on_top_var = tk.BooleanVar(value=self.config.get("always_on_top", False))
         always_on_top_cb = ttk.Checkbutton(
@@ -406,6 +2472,74 @@ class BeeSwarmNotifier:
         # Warning for scan interval
         ttk.Label(detection_frame, text="Higher interval = higher chance of missing detections, Lower interval = higher chance of double detections.", wraplength=250, font=("Arial", 8)).pack(side="left", padx=5, pady=2)
 
+        # Alert clip settings
+        clip_frame = ttk.LabelFrame(scrollable_frame, text="Event Clips")
+        clip_frame.pack(fill="x", padx=10, pady=10)
+        
+        self.alert_clip_enabled_var = tk.BooleanVar(value=self.config.get("alert_clip_enabled", False))
+        clip_cb = ttk.Checkbutton(
+            clip_frame,
+            text="Attach a clip of the seconds around each event",
+            variable=self.alert_clip_enabled_var,
+            command=self.save_config
+        )
+        clip_cb.pack(anchor="w", padx=10, pady=5)
+        
+        clip_row = ttk.Frame(clip_frame)
+        clip_row.pack(fill="x", padx=10, pady=2)
+        ttk.Label(clip_row, text="Seconds before:").pack(side="left")
+        self.alert_clip_pre_seconds_var = tk.StringVar(value=self.config.get("alert_clip_pre_seconds", "3"))
+        ttk.Spinbox(clip_row, from_=0, to=30, textvariable=self.alert_clip_pre_seconds_var, width=5, increment=0.5).pack(side="left", padx=5)
+        self.alert_clip_pre_seconds_var.trace("w", self.save_config)
+        ttk.Label(clip_row, text="after:").pack(side="left")
+        self.alert_clip_post_seconds_var = tk.StringVar(value=self.config.get("alert_clip_post_seconds", "2"))
+        ttk.Spinbox(clip_row, from_=0, to=30, textvariable=self.alert_clip_post_seconds_var, width=5, increment=0.5).pack(side="left", padx=5)
+        self.alert_clip_post_seconds_var.trace("w", self.save_config)
+        ttk.Label(clip_row, text="Memory (MB):").pack(side="left")
+        self.alert_clip_max_mb_var = tk.StringVar(value=self.config.get("alert_clip_max_mb", "20"))
+        ttk.Spinbox(clip_row, from_=1, to=500, textvariable=self.alert_clip_max_mb_var, width=5, increment=1).pack(side="left", padx=5)
+        self.alert_clip_max_mb_var.trace("w", self.save_config)
+        ttk.Label(clip_frame, text="Changes apply the next time detection starts", font=("Arial", 8)).pack(anchor="w", padx=10, pady=2)
+
+        # Item digest settings
+        digest_frame = ttk.LabelFrame(scrollable_frame, text="Item Digest")
+        digest_frame.pack(fill="x", padx=10, pady=10)
+        
+        self.item_digest_enabled_var = tk.BooleanVar(value=self.config.get("item_digest_enabled", False))
+        digest_cb = ttk.Checkbutton(
+            digest_frame,
+            text="Send Silent drops as one summary per window",
+            variable=self.item_digest_enabled_var,
+            command=self.save_config
+        )
+        digest_cb.pack(anchor="w", padx=10, pady=5)
+        
+        ttk.Label(digest_frame, text="Digest Window (minutes):").pack(anchor="w", padx=10, pady=2)
+        self.item_digest_window_var = tk.StringVar(value=self.config.get("item_digest_window", "15"))
+        digest_window_spin = ttk.Spinbox(digest_frame, from_=1, to=120, textvariable=self.item_digest_window_var, width=10, increment=1)
+        digest_window_spin.pack(anchor="w", padx=10, pady=2)
+        self.item_digest_window_var.trace("w", self.save_config)
+
+        # Profiling settings
+        profile_frame = ttk.LabelFrame(scrollable_frame, text="Profiling")
+        profile_frame.pack(fill="x", padx=10, pady=10)
+        
+        self.profile_enabled_var = tk.BooleanVar(value=self.config.get("profile_enabled", False))
+        profile_cb = ttk.Checkbutton(
+            profile_frame,
+            text="Profile detection and Live Feed when they start",
+            variable=self.profile_enabled_var,
+            command=self.save_config
+        )
+        profile_cb.pack(anchor="w", padx=10, pady=5)
+        
+        ttk.Label(profile_frame, text="Profile Duration (seconds):").pack(anchor="w", padx=10, pady=2)
+        self.profile_seconds_var = tk.StringVar(value=self.config.get("profile_seconds", "60"))
+        profile_seconds_spin = ttk.Spinbox(profile_frame, from_=5, to=3600, textvariable=self.profile_seconds_var, width=10, increment=5)
+        profile_seconds_spin.pack(anchor="w", padx=10, pady=2)
+        self.profile_seconds_var.trace("w", self.save_config)
+        ttk.Label(profile_frame, text=f"Reports are written to {self.config.get('profile_dir', 'bssn_profiles')}/", font=("Arial", 8)).pack(anchor="w", padx=10, pady=2)
+
         # Hotkey settings
         hotkey_frame = ttk.LabelFrame(scrollable_frame, text="Hotkey Settings")
         hotkey_frame.pack(fill="x", padx=10, pady=10)
@@ -512,20 +2646,43 @@ class BeeSwarmNotifier:
         pass # No specific action needed on release
     
     def populate_items_tree(self):
-        # Clear existing items
-        for item in self.items_tree.get_children():
-            self.items_tree.delete(item)
+        # Build every row once; searching and mode changes only touch existing rows afterwards
+        self.items_tree.delete(*self.items_tree.get_children())
+        self.item_rows = {}
+        self.item_names_by_row = {}
+        self.item_search_index = []
         
-        # Add items with their current mode
-        search_term = self.search_var.get().lower()
-        for item in sorted(self.bee_swarm_items):
-            if not search_term or search_term in item.lower():
-                mode = self.config["items"].get(item, "off")
-                mode_display = {"off": "🚫 Off", "silent": "📤 Silent", "notify": "🔔 Notify"}
-                self.items_tree.insert("", "end", values=(item, mode_display[mode]))
+        for item in sorted(self.rules.items):
+            mode = self.config["items"].get(item, "off")
+            row_id = self.items_tree.insert("", "end", values=(item, self.item_mode_display[mode]))
+            self.item_rows[item] = row_id
+            self.item_names_by_row[row_id] = item
+            self.item_search_index.append((item.lower(), row_id))
+        
+        self.visible_item_rows = set(self.item_names_by_row)
+        self.apply_item_filter()
     
     def filter_items(self, *args):
-        self.populate_items_tree()
+        # Debounce keystrokes so a burst of typing only filters once
+        if self.item_filter_job is not None:
+            self.root.after_cancel(self.item_filter_job)
+        self.item_filter_job = self.root.after(self.ITEM_SEARCH_DEBOUNCE_MS, self.apply_item_filter)
+    
+    def apply_item_filter(self):
+        self.item_filter_job = None
+        search_term = self.search_var.get().lower()
+        
+        # Rows are walked in display order, so a reattached row's index is the number of visible rows before it
+        visible_index = 0
+        for item_lower, row_id in self.item_search_index:
+            if not search_term or search_term in item_lower:
+                if row_id not in self.visible_item_rows:
+                    self.items_tree.move(row_id, "", visible_index)
+                    self.visible_item_rows.add(row_id)
+                visible_index += 1
+            elif row_id in self.visible_item_rows:
+                self.items_tree.detach(row_id)
+                self.visible_item_rows.discard(row_id)
     
     def toggle_item_mode(self, event):
         selection = self.items_tree.selection()
@@ -533,15 +2690,17 @@ class BeeSwarmNotifier:
             return
         
         item_id = selection[0]
-        item_name = self.items_tree.item(item_id)["values"][0]
+        item_name = self.item_names_by_row.get(item_id)
+        if item_name is None:
+            return
         
         current_mode = self.config["items"].get(item_name, "off")
         mode_cycle = {"off": "silent", "silent": "notify", "notify": "off"}
         new_mode = mode_cycle[current_mode]
         
         self.config["items"][item_name] = new_mode
-        self.save_config()
-        self.populate_items_tree()
+        self.save_config(changed_fields=("items",))
+        self.items_tree.item(item_id, values=(item_name, self.item_mode_display[new_mode]))
     
     def test_event_webhook(self):
         webhook_url = self.event_webhook_var.get().strip()
@@ -553,7 +2712,7 @@ class BeeSwarmNotifier:
             payload = {
                 "content": "🧪 **Test Event Notification**\nThis is a test message from Bee Swarm Smart Notifier!"
             }
-            response = requests.post(webhook_url, json=payload)
+            response = self.http.post(webhook_url, json=payload)
             if response.status_code == 204:
                 messagebox.showinfo("Success", "Test event sent successfully!")
             else:
@@ -571,7 +2730,7 @@ class BeeSwarmNotifier:
             payload = {
                 "content": "🧪 **Test Item Drop**\n🎁 You received a Test Item!"
             }
-            response = requests.post(webhook_url, json=payload)
+            response = self.http.post(webhook_url, json=payload)
             if response.status_code == 204:
                 messagebox.showinfo("Success", "Test item drop sent successfully!")
             else:
@@ -588,15 +2747,9 @@ class BeeSwarmNotifier:
         try:
             # Capture a test screenshot
             test_screenshot = ImageGrab.grab()
-            temp_file = "test_screenshot.png"
-            test_screenshot.save(temp_file)
-
-            with open(temp_file, 'rb') as f:
-                files = {'file': (temp_file, f, 'image/png')}
-                payload = {"content": "🧪 **Test Full Screenshot**\nThis is a test full screenshot from Bee Swarm Smart Notifier!"}
-                response = requests.post(webhook_url, data=payload, files=files)
-
-            os.remove(temp_file) # Clean up temp file
+            files = {'file': ("test_screenshot.png", self._encode_png(test_screenshot), 'image/png')}
+            payload = {"content": "🧪 **Test Full Screenshot**\nThis is a test full screenshot from Bee Swarm Smart Notifier!"}
+            response = self.http.post(webhook_url, data=payload, files=files)
             
             if response.status_code in [200, 204]: # Discord returns 204 No Content for successful webhook posts, but 200 with content also means success
                 messagebox.showinfo("Success", "Test screenshot sent successfully!")
@@ -628,163 +2781,705 @@ class BeeSwarmNotifier:
         self.root.attributes("-topmost", self.always_on_top_var.get())
     
     def start_detection(self):
+        self.detection_start_job = None
         if self.detection_running:
             return
         
         # Validate configuration
-        if not self.event_webhook_var.get().strip() and not self.item_webhook_var.get().strip():
-            messagebox.showwarning("Warning", "Please configure at least one webhook URL before starting detection.")
+        if not self._has_destination():
+            messagebox.showwarning("Warning", "Please configure at least one webhook URL or rules file destination before starting detection.")
+            return
+        
+        # A stopped loop can still be inside an OCR call; start only after it has exited so two never overlap
+        if self._previous_run_busy("Detection", (self.detection_thread, self.capture_thread)):
+            if self.detection_start_job is None:
+                self.detection_start_job = self.root.after(50, self.start_detection)
             return
         
+        self.detection_stop = threading.Event()
+        try:
+            capture_buffer_size = int(self.config.get("capture_buffer_size", "4"))
+        except ValueError:
+            capture_buffer_size = 4
+        self.frame_ring = FrameRing(capture_buffer_size, self.config.get("capture_policy", "latest"))
+        self.frame_history = self._make_frame_history()
         self.detection_running = True
         self.start_button.configure(state="disabled")
         self.stop_button.configure(state="normal")
         self.status_label.configure(text="Status: Running", foreground="green")
         
-        # Start detection thread
-        self.detection_thread = threading.Thread(target=self.detection_loop, daemon=True)
-        self.detection_thread.start()
+        # Start the capture and detection threads under watchdog supervision
+        restart = lambda: setattr(self, "capture_thread", self.start_worker("capture", self.capture_loop))
+        self.watchdog.register("capture", lambda: self.settings.scan_interval, restart)
+        restart = lambda: setattr(self, "detection_thread", self.start_worker("detection", self.detection_loop))
+        self.watchdog.register("detection", lambda: self.settings.scan_interval, restart)
+        self.capture_thread = self.start_worker("capture", self.capture_loop)
+        self.detection_thread = self.start_worker("detection", self.detection_loop)
+        self.start_profiler()
         
         self.log_status("Detection started successfully!")
     
+    def _has_destination(self):
+        # Whether any event or reported item would be posted somewhere: a Webhooks tab slot or a rules file destination
+        settings = self.settings
+        rules = settings.rules
+        return (any(self._destinations(rule, None, settings) for rule in rules.events.values())
+                or any(self._destinations(rules.items[item_name], mode, settings) for item_name, mode in settings.item_modes.items()))
+    
+    def _make_frame_history(self):
+        if not self.config.get("alert_clip_enabled", False):
+            return None
+        try:
+            return FrameHistory(float(self.config.get("alert_clip_pre_seconds", "3")),
+                                float(self.config.get("alert_clip_post_seconds", "2")),
+                                max(0.05, float(self.config.get("alert_clip_frame_interval", "0.5"))),
+                                max(0.05, float(self.config.get("alert_clip_burst_interval", "0.2"))),
+                                float(self.config.get("alert_clip_max_mb", "20")) * 1024 * 1024,
+                                self.config.get("alert_clip_format", "webp"))
+        except ValueError:
+            return FrameHistory(fmt=self.config.get("alert_clip_format", "webp"))
+    
     def stop_detection(self):
+        if self.detection_start_job is not None:
+            self.root.after_cancel(self.detection_start_job)
+            self.detection_start_job = None
+        self.start_deadlines.pop("Detection", None)
         self.detection_running = False
+        self.detection_stop.set() # Wakes the loops immediately
+        self.frame_ring.close()
+        self._flush_event_clips()
+        self.watchdog.unregister("capture")
+        self.watchdog.unregister("detection")
         self.start_button.configure(state="normal")
         self.stop_button.configure(state="disabled")
         self.status_label.configure(text="Status: Stopped", foreground="red")
         self.log_status("Detection stopped.")
+        if self.profiler is not None and not self.full_screenshot_running:
+            self.profiler.stop() # Write what was sampled so far
+        self._report_frame_stats()
+        self._report_frame_history()
+        self._report_latency()
+        self._report_ocr_cache(force=True)
+        self._report_http_stats()
+        self._report_destinations()
+        self.item_digest_flush = True
+        self.item_digest_wakeup.set() # Post the partial digest window now
     
-    def detection_loop(self):
+    def start_profiler(self):
+        # One profiling run at a time, only when switched on; a finished run writes its report and logs the top functions
+        if not self.config.get("profile_enabled", False) or (self.profiler is not None and self.profiler.running()):
+            return
         try:
-            scan_interval = float(self.scan_interval_var.get())
+            duration = max(1.0, float(self.config.get("profile_seconds", "60")))
+            interval = max(1.0, float(self.config.get("profile_interval_ms", "10"))) / 1000
         except ValueError:
-            scan_interval = 3.0
-        
-        while self.detection_running:
+            duration, interval = 60.0, 0.01
+        self.profiler = SamplingProfiler(("capture", "detection", "alert_clip", "live_feed", "live_feed_upload", "digest", "deliver", "spool"), interval, duration,
+                                         on_done=self._on_profile_done).start()
+        self.log_status(f"Profiling for {duration:g}s...")
+    
+    def _on_profile_done(self, profiler):
+        # Called from the profiler thread
+        if not profiler.samples:
+            return
+        try:
+            report_path, stacks_path = profiler.write(self.config.get("profile_dir", "bssn_profiles"))
+        except OSError as e:
+            self.log_status(f"Could not write profile: {str(e)}")
+            return
+        sampled = sum(profiler.stacks.values()) or 1
+        top = ", ".join(f"{label} {own / sampled:.0%}" for label, own, total in
+                        sorted(profiler.function_stats(), key=lambda entry: -entry[1])[:3])
+        self.log_status(f"Profile written to {report_path} and {stacks_path}; most self time: {top}")
+    
+    def _previous_run_busy(self, label, threads):
+        # Whether a start should keep waiting for the last run's threads. The wait is logged once and capped at
+        # START_WAIT; after that the stuck threads are left behind. Starting bumps each worker's generation, so
+        # when they finally return from whatever blocked them they are no longer current and exit without acting.
+        if not any(thread is not None and thread.is_alive() for thread in threads):
+            self.start_deadlines.pop(label, None)
+            return False
+        deadline = self.start_deadlines.get(label)
+        if deadline is None:
+            self.start_deadlines[label] = time.monotonic() + self.START_WAIT
+            self.log_status(f"{label}: previous run still finishing, starting once it exits...")
+            return True
+        if time.monotonic() < deadline:
+            return True
+        del self.start_deadlines[label]
+        self.log_status(f"{label}: previous run still busy after {self.START_WAIT}s, starting without it")
+        return False
+    
+    def start_worker(self, name, target):
+        # (Re)start a worker loop; an older thread of the same name exits at its next check
+        generation = self.worker_generations.get(name, 0) + 1
+        self.worker_generations[name] = generation
+        thread = threading.Thread(target=target, args=(generation,), daemon=True, name=name)
+        thread.start()
+        return thread
+    
+    def worker_current(self, name, generation):
+        return self.worker_generations.get(name) == generation
+    
+    def _on_worker_stall(self, name, silent_seconds):
+        # Called from the watchdog thread right before it restarts the worker
+        message = f"Watchdog: '{name}' worker silent for {silent_seconds:.0f}s, restarting it"
+        self.log_status(message)
+        webhook_url = self.config.get("watchdog_webhook", "").strip()
+        if webhook_url:
+            threading.Thread(target=self._deliver, args=(webhook_url, f"⚠️ **Bee Swarm Smart Notifier** ({datetime.now():%H:%M:%S})\n{message}"), daemon=True).start()
+    
+    def _on_worker_recover(self, name, stall_seconds, stats):
+        self.log_status(f"Watchdog: '{name}' worker running again after a {stall_seconds:.1f}s stall "
+                        f"({stats['stalls']} stalls, {stats['stall_seconds']:.0f}s stalled in total, longest {stats['longest_stall']:.1f}s)")
+    
+    def capture_loop(self, generation):
+        # Producer: grab the OCR region on a fixed cadence, however long OCR and sending take
+        # With alert clips on it also feeds the frame history, capturing at the (faster) history rate and passing
+        # every capture that falls due for a scan on to OCR
+        stop = self.detection_stop
+        ring = self.frame_ring
+        history = self.frame_history
+        next_due = next_scan = time.monotonic()
+        while not stop.is_set() and self.worker_current("capture", generation):
+            self.watchdog.beat("capture")
+            # Re-read the snapshot every pass so interval and region changes apply without a restart
+            settings = self.settings
+            scan_due = history is None or time.monotonic() >= next_scan - 0.01
             try:
-                # Capture screen region (bottom-right corner)
-                screenshot = ImageGrab.grab(bbox=(1300, 675, 1820, 1080))  # Matched AHK perfect coordinates
-                
-                # Perform OCR
-                try:
-                    text = pytesseract.image_to_string(screenshot)
-                    self.process_detected_text(text, screenshot)
-                except Exception as e:
-                    self.log_status(f"OCR Error: {str(e)}")
-                
-                time.sleep(scan_interval)
-                
+                # Capture screen region (bottom-right corner by default)
+                image = ImageGrab.grab(bbox=settings.ocr_region)  # Matched AHK perfect coordinates
+                captured_at = time.time()
+                if scan_due:
+                    ring.put(image, captured_at)
+                if history is not None:
+                    history.add(image, captured_at)
+            except Exception as e:
+                self.log_status(f"Capture Error: {str(e)}")
+            
+            if history is None:
+                next_due += settings.scan_interval
+            else:
+                if scan_due:
+                    next_scan = max(next_scan + settings.scan_interval, time.monotonic())
+                next_due += min(history.interval(time.time()), settings.scan_interval)
+            now = time.monotonic()
+            if next_due < now:
+                next_due = now # Behind schedule (slow grab or a suspended machine): skip the missed ticks instead of bursting
+            stop.wait(next_due - now)
+    
+    def detection_loop(self, generation):
+        # Consumer: OCR and match frames from the capture ring
+        stop = self.detection_stop
+        ring = self.frame_ring
+        while not stop.is_set() and self.worker_current("detection", generation):
+            self.watchdog.beat("detection")
+            settings = self.settings
+            frame = ring.get(timeout=max(1.0, settings.scan_interval))
+            if frame is None:
+                continue
+            screenshot, captured_at = frame
+            try:
+                lines = self.read_confident_lines(screenshot, settings)
+                if stop.is_set() or not self.worker_current("detection", generation):
+                    break # Stopped or replaced during OCR: drop this pass rather than alerting late
+                self.process_detected_text(lines, screenshot, {"captured": captured_at, "ocr_done": time.time()})
             except Exception as e:
-                self.log_status(f"Detection Error: {str(e)}")
-                time.sleep(scan_interval)
+                self.log_status(f"OCR Error: {str(e)}")
+    
+    def _report_frame_history(self):
+        # What the alert clip buffer costs: memory held and the capture-thread time spent compressing frames
+        if self.frame_history is None:
+            return
+        stats = self.frame_history.stats()
+        if not stats["added"]:
+            return
+        self.log_status(f"Alert clip buffer: {stats['frames']} frames, {stats['bytes'] / 1048576:.1f} MB held "
+                        f"(peak {stats['peak_bytes'] / 1048576:.1f} MB of {self.frame_history.max_bytes / 1048576:g} MB, "
+                        f"{stats['evicted_for_memory']} evicted for memory); JPEG encode "
+                        f"{stats['encode_seconds'] / stats['added'] * 1000:.1f} ms per frame over {stats['added']} frames"
+                        + (f"; {stats['clips']} clips built in {stats['clip_seconds'] / stats['clips'] * 1000:.0f} ms each"
+                           if stats["clips"] else ""))
     
-    def process_detected_text(self, text, screenshot):
-        text_lower = text.lower()
-        self.log_status(f"Processing text: {text_lower}") # Added for debugging
+    def _report_frame_stats(self):
+        stats = self.frame_ring.stats()
+        if stats["captured"]:
+            self.log_status(f"Frames: {stats['captured']} captured, {stats['processed']} processed, "
+                            f"{stats['dropped'] + stats['pending']} dropped ({self.frame_ring.policy})")
+    
+    def read_confident_lines(self, screenshot, settings):
+        # OCR the region line by line, keeping only lines Tesseract is reasonably sure about
+        if settings.color_mask is not None:
+            # OCR a white-on-black image of just the text colours; line boxes still match the original frame
+            screenshot, ink = settings.color_mask.apply(screenshot)
+            if ink < settings.color_mask_min_ink:
+                return [] # Nothing in the text colours, so there is nothing to read
+        if self.ocr_cache is None:
+            return self._filter_confident_lines(screenshot, read_ocr_lines(screenshot, settings.ocr_profile), settings)
         
-        # Check for events
-        event_patterns = {
-            "puffshroom": r"puffshroom.*spawn",
-            "sprout": r"a .* sprout has appeared.*|.* has planted .* sprout.*",
-            "meteor_shower": r"meteor.*shower",
-            "honey_storm": r"a honeystorm has been summoned!|.* has summoned a honeystorm!",
-            "windy_bee": r"found a windy bee",
-            "vicious_bee": r"vicious bee is attacking",
-            "mondo_chicken": r"mondo chick has spawned.*",
-            "stick_bug": r"started the stick bug challenge.*"
-        }
+        # Split the region into text bands; only bands not seen before go to Tesseract. Cached lines have already
+        # been through the confidence filter, so a new profile or filter setting re-reads every band.
+        settings_key = f"{settings.ocr_profile.label()}|{settings.ocr_min_confidence:g}|{int(settings.ocr_retry_low_confidence)}|"
+        lines = []
+        missed = []
+        for top, bottom in find_text_bands(screenshot, settings.ocr_band_threshold):
+            band = screenshot.crop((0, top, screenshot.width, bottom))
+            key = settings_key + band_hash(band, settings.ocr_band_threshold)
+            cached = self.ocr_cache.get(key)
+            if cached is None:
+                missed.append((key, top, band))
+            else:
+                lines.extend(self._offset_lines(cached, top))
         
-        for event_key, pattern in event_patterns.items():
-            if self.config["events"].get(event_key, False) and re.search(pattern, text_lower):
-                self.send_event_notification(event_key, text, screenshot)
+        if missed:
+            started = time.perf_counter()
+            for key, top, band_lines in self._ocr_bands(missed, settings):
+                self.ocr_cache.put(key, band_lines)
+                lines.extend(self._offset_lines(band_lines, top))
+            self.ocr_cache.add_ocr_time(time.perf_counter() - started)
         
-        # Check for item drops
-        for item_name, mode in self.config["items"].items():
-            if mode != "off" and item_name.lower() in text_lower:
-                self.log_status(f"Found '{item_name}' in text. Sending item notification.")
-                self.send_item_notification(item_name, mode, text, screenshot)
+        self._report_ocr_cache()
+        return sorted(lines, key=lambda line: line.bbox[1])
     
-    def send_event_notification(self, event_key, detected_text, screenshot):
-        webhook_url = self.event_webhook_var.get().strip()
-        if not webhook_url:
+    def _ocr_bands(self, missed, settings):
+        # Stack all unseen bands into one image so a scan costs at most one Tesseract call,
+        # then hand each recognised line back to the band it came from
+        gap = 12
+        width = max(band.width for key, top, band in missed)
+        height = sum(band.height for key, top, band in missed) + gap * (len(missed) - 1)
+        sheet = Image.new("RGB", (width, height))
+        slots = []
+        y = 0
+        for key, top, band in missed:
+            sheet.paste(band, (0, y))
+            slots.append((y, y + band.height, key, top))
+            y += band.height + gap
+        
+        band_lines = {key: [] for y_start, y_end, key, top in slots}
+        for line in self._filter_confident_lines(sheet, read_ocr_lines(sheet, settings.ocr_profile), settings):
+            center = (line.bbox[1] + line.bbox[3]) / 2
+            for y_start, y_end, key, top in slots:
+                if y_start - gap / 2 <= center < y_end + gap / 2:
+                    left, line_top, right, line_bottom = line.bbox
+                    band_lines[key].append(OcrLine(line.text, line.confidence, (left, line_top - y_start, right, line_bottom - y_start)))
+                    break
+        return [(key, top, band_lines[key]) for y_start, y_end, key, top in slots]
+    
+    def _offset_lines(self, lines, top):
+        # Band-relative lines back to region coordinates
+        return [OcrLine(line.text, line.confidence, (line.bbox[0], line.bbox[1] + top, line.bbox[2], line.bbox[3] + top)) for line in lines]
+    
+    def _filter_confident_lines(self, image, raw_lines, settings):
+        lines = []
+        dropped = 0
+        for line in raw_lines:
+            if line.confidence < settings.ocr_min_confidence and settings.ocr_retry_low_confidence:
+                line = self._retry_ocr_line(image, line, settings.ocr_profile)
+            if line.confidence >= settings.ocr_min_confidence:
+                lines.append(line)
+            else:
+                dropped += 1
+        if dropped:
+            self.log_status(f"Dropped {dropped} low-confidence OCR line(s)")
+        return lines
+    
+    def _report_ocr_cache(self, force=False):
+        # Log cache effectiveness every few minutes while scanning
+        if self.ocr_cache is None or (not force and time.time() - self.last_ocr_cache_report < 300):
+            return
+        self.last_ocr_cache_report = time.time()
+        stats = self.ocr_cache.stats()
+        self.log_status(f"OCR cache: {stats['hit_rate']:.0%} hit rate ({stats['hits']} hits, {stats['misses']} misses), "
+                        f"~{stats['saved_seconds']:.1f}s of OCR saved")
+    
+    def _retry_ocr_line(self, screenshot, line, profile):
+        # Re-read one line on its own, enlarged, as a single text line (--psm 7)
+        left, top, right, bottom = line.bbox
+        crop = screenshot.crop((max(0, left - 4), max(0, top - 4), min(screenshot.width, right + 4), min(screenshot.height, bottom + 4)))
+        crop = crop.resize((crop.width * 2, crop.height * 2), Image.LANCZOS)
+        retried = read_ocr_lines(crop, profile, psm=7)
+        if not retried:
+            return line
+        best = max(retried, key=lambda candidate: candidate.confidence)
+        if best.confidence <= line.confidence:
+            return line
+        return OcrLine(best.text, best.confidence, line.bbox) # Keep region coordinates for cropping
+    
+    def process_detected_text(self, lines, screenshot, timing=None):
+        # timing holds the frame's "captured" and "ocr_done" timestamps; each detection gets its own copy
+        settings = self.settings
+        timing = timing or {}
+        self.log_status("Processing text: " + " | ".join(line.text.lower() for line in lines)) # Added for debugging
+        frame_hash = None
+        
+        # Match line by line so patterns cannot span unrelated lines
+        for line in lines:
+            text_lower = line.text.lower()
+            
+            # Check for events; one combined pass covers every enabled event
+            for rule, match in settings.event_matcher.find(text_lower):
+                frame_hash = frame_hash or self._frame_hash(screenshot)
+                detection_id = self._journal_record("event", rule.key, None, line.text, frame_hash)
+                self.send_event_notification(rule.key, line.text, screenshot, detection_id, line, dict(timing, matched=time.time()))
+            
+            # Check for item drops
+            for rule, quantity in settings.item_parser.parse(text_lower):
+                item_name = rule.key
+                matched_at = time.time()
+                mode = settings.item_modes[item_name]
+                frame_hash = frame_hash or self._frame_hash(screenshot)
+                detection_id = self._journal_record("item", item_name, mode, line.text, frame_hash, quantity)
+                if mode == "silent" and settings.item_digest_enabled:
+                    # Silent drops are summarised by item_digest_loop instead of posted one by one
+                    self.item_digest.add(item_name, quantity)
+                    self._journal_delivery(detection_id, "digest")
+                    continue
+                self.log_status(f"Found {quantity}x '{item_name}' in text. Sending item notification.")
+                self.send_item_notification(item_name, mode, line.text, screenshot, detection_id, line, dict(timing, matched=matched_at), quantity)
+    
+    def _alert_image(self, screenshot, matched_line):
+        # The image attached to an alert: a tight crop around the matched OcrLine, or the whole region
+        settings = self.settings
+        if settings.attachment_mode != "crop" or matched_line is None:
+            return screenshot
+        
+        left, top, right, bottom = matched_line.bbox
+        margin = settings.crop_margin
+        crop = screenshot.crop((max(0, left - margin), max(0, top - margin),
+                                min(screenshot.width, right + margin), min(screenshot.height, bottom + margin)))
+        if settings.crop_upscale > 1:
+            crop = crop.resize((round(crop.width * settings.crop_upscale), round(crop.height * settings.crop_upscale)), Image.LANCZOS)
+        return crop
+    
+    def _frame_hash(self, screenshot):
+        return hashlib.blake2b(screenshot.tobytes(), digest_size=8).hexdigest()
+    
+    def _journal_record(self, kind, key, mode, raw_line, frame_hash, quantity=1):
+        if not self.journal:
+            return None
+        region = ",".join(str(v) for v in self.settings.ocr_region)
+        return self.journal.record(kind, key, mode, raw_line, region, frame_hash, quantity=quantity)
+    
+    def _journal_delivery(self, detection_id, delivery):
+        if self.journal:
+            self.journal.update_delivery(detection_id, delivery)
+    
+    def _on_journal_error(self, error):
+        self.log_status(f"Journal error: {str(error)}")
+    
+    def _on_delivery_error(self, error):
+        self.log_status(f"Delivery error: {str(error)}")
+    
+    def send_event_notification(self, event_key, detected_text, screenshot, detection_id=None, matched_line=None, timing=None):
+        settings = self.settings
+        rule = settings.rules.events[event_key]
+        destinations = self._destinations(rule, None, settings)
+        if not destinations:
+            self._journal_delivery(detection_id, "no_webhook")
             return
         
-        event_name = self.event_definitions[event_key]
+        event_name = rule.name
         timestamp = datetime.now().strftime("%H:%M:%S")
-        notification_id = ("event", event_key)
         
         content = f"🎯 **EVENT DETECTED** ({timestamp})\n📍 {event_name}"
         
         # Check for possible double detection
-        current_time = time.time()
-        if notification_id in self.last_notification_time and \
-           (current_time - self.last_notification_time[notification_id]) < self.COOLDOWN_TIME:
+        if self._in_cooldown(("event", event_key), rule.cooldown):
             self.log_status(f"Suppressed duplicate event notification for {event_name}")
+            self._journal_delivery(detection_id, "suppressed")
             return # Do not send if within cooldown
 
-        self.last_notification_time[notification_id] = current_time
-
-        payload = {"content": content}
+        def report(status, detail, target):
+            if status == "sent":
+                self.log_status(f"Event notification sent{target}: {event_name}. Status: {detail}")
+            elif status == "spooled":
+                self.log_status(f"Event notification for {event_name}{target} queued for retry ({detail})")
+            else:
+                self.log_status(f"Failed to send event notification{target}: {detail}")
+        
+        timing = dict(timing or {}, kind="event", key=event_key)
+        history = self.frame_history
+        if settings.screenshot_enabled and history is not None:
+            # Capture faster for the post-event part, then post the clip once it has been recorded
+            history.burst(time.time() + history.post_seconds)
+            hurry = threading.Event()
+            clip_thread = threading.Thread(target=self._event_clip_worker, daemon=True, name="alert_clip",
+                                           args=(hurry, history, destinations, content, screenshot, matched_line, detection_id, timing, report))
+            with self.event_clips_lock:
+                self.event_clips = [clip for clip in self.event_clips if clip[0].is_alive()] + [(clip_thread, hurry)]
+            clip_thread.start()
+            return
         
+        attachment = self._encode_png(self._alert_image(screenshot, matched_line)) if settings.screenshot_enabled else None
+        self._fan_out(destinations, content, attachment, "event_screenshot.png", detection_id, timing, report)
+    
+    def _event_clip_worker(self, hurry, history, *clip_args):
+        hurry.wait(history.post_seconds) # Set by _flush_event_clips when detection stops or the app closes
+        self._send_event_clip(history, *clip_args)
+    
+    def _flush_event_clips(self, wait=None):
+        # Posts clips still waiting for their post-event frames right away, with what the buffer holds by now.
+        # wait (seconds) also joins them, so none is posted after the delivery queues and spool have closed.
+        with self.event_clips_lock:
+            clips, self.event_clips = self.event_clips, []
+        for clip_thread, hurry in clips:
+            hurry.set()
+        if wait is not None:
+            deadline = time.monotonic() + wait
+            for clip_thread, hurry in clips:
+                clip_thread.join(max(0.0, deadline - time.monotonic()))
+    
+    def _send_event_clip(self, history, destinations, content, screenshot, matched_line, detection_id, timing, report):
+        # Runs post_seconds after the detection; falls back to the usual screenshot if the buffer has too little
         try:
-            if self.screenshot_var.get():
-                # Save screenshot to a temporary file and attach it
-                temp_file = "event_screenshot.png"
-                screenshot.save(temp_file)
-                
-                with open(temp_file, 'rb') as f:
-                    files = {'file': (temp_file, f, 'image/png')}
-                    response = requests.post(webhook_url, data=payload, files=files)
-                os.remove(temp_file) # Clean up temp file
-            else:
-                response = requests.post(webhook_url, json=payload) # Send without screenshot if disabled
-            
-            if response.status_code in [200, 204]:
-                self.log_status(f"Event notification sent: {event_name}. Status: {response.status_code}")
-            else:
-                self.log_status(f"Failed to send event notification: {response.status_code} - {response.text}")
+            clip = history.clip(timing.get("captured", time.time()))
         except Exception as e:
-            self.log_status(f"Error sending event notification: {str(e)}")
+            self.log_status(f"Could not build event clip: {str(e)}")
+            clip = None
+        if clip is None:
+            self._fan_out(destinations, content, self._encode_png(self._alert_image(screenshot, matched_line)),
+                          "event_screenshot.png", detection_id, timing, report)
+            return
+        data, extension, frame_count = clip
+        content += f"\n🎞️ {history.pre_seconds:g}s before to {history.post_seconds:g}s after ({frame_count} frames)"
+        self._fan_out(destinations, content, data, f"event_clip.{extension}", detection_id, timing, report)
     
-    def send_item_notification(self, item_name, mode, detected_text, screenshot):
-        webhook_url = self.item_webhook_var.get().strip()
-        if not webhook_url:
+    def send_item_notification(self, item_name, mode, detected_text, screenshot, detection_id=None, matched_line=None, timing=None, quantity=1):
+        settings = self.settings
+        rule = settings.rules.items[item_name]
+        destinations = self._destinations(rule, mode, settings)
+        if not destinations:
+            self._journal_delivery(detection_id, "no_webhook")
+            return
+        
+        if self._in_cooldown(("item", item_name), rule.cooldown):
+            self.log_status(f"Suppressed duplicate item notification for {item_name}")
+            self._journal_delivery(detection_id, "suppressed")
             return
         
         timestamp = datetime.now().strftime("%H:%M:%S")
-        notification_id = ("item", item_name)
+        received = f"{quantity}x {item_name}" if quantity > 1 else f"a {item_name}"
 
         if mode == "notify":
-            content = f"@everyone\n🎁 **RARE DROP: You received a {item_name}!** ({timestamp})"
+            content = f"@everyone\n🎁 **RARE DROP: You received {received}!** ({timestamp})"
         else:  # silent
-            content = f"🎁 You received a {item_name}! ({timestamp})"
+            content = f"🎁 You received {received}! ({timestamp})"
         
-        payload = {"content": content}
+        def report(status, detail, target):
+            if status == "sent":
+                self.log_status(f"Item notification sent{target}: {quantity}x {item_name} ({mode}). Status: {detail}")
+            elif status == "spooled":
+                self.log_status(f"Item notification for {item_name}{target} queued for retry ({detail})")
+            else:
+                self.log_status(f"Failed to send item notification{target}: {detail}")
         
-        try:
-            if self.screenshot_var.get():
-                # Save screenshot to a temporary file and attach it
-                temp_file = "item_screenshot.png"
-                screenshot.save(temp_file)
-                
-                with open(temp_file, 'rb') as f:
-                    files = {'file': (temp_file, f, 'image/png')}
-                    response = requests.post(webhook_url, data=payload, files=files)
-                os.remove(temp_file) # Clean up temp file
+        attachment = self._encode_png(self._alert_image(screenshot, matched_line)) if settings.screenshot_enabled else None
+        self._fan_out(destinations, content, attachment, "item_screenshot.png", detection_id,
+                      dict(timing or {}, kind="item", key=item_name), report)
+    
+    def _resolve_webhook(self, target, settings):
+        # A destination is one of the configured slots, a named destination from the rules file or a URL of its own
+        slots = {"event": settings.event_webhook, "item": settings.item_webhook, "screenshot": settings.screenshot_webhook}
+        if target in slots:
+            return slots[target]
+        return settings.rules.destinations.get(target, target).strip()
+    
+    def _destinations(self, rule, mode, settings):
+        # [(label, url)] a detection is routed to; empty slots are skipped and each URL is posted to once
+        destinations = {}
+        for target in settings.rules.destinations_for(rule, mode):
+            url = self._resolve_webhook(target, settings)
+            if url and url not in destinations:
+                destinations[url] = target if not target.startswith(("http://", "https://")) else webhook_label(target)
+        return [(label, url) for url, label in destinations.items()]
+    
+    def _fan_out(self, destinations, content, attachment, filename, detection_id, timing, report):
+        # Hands the notification to each destination's queue. report(status, detail, target) logs every outcome;
+        # the journal gets one delivery status once all destinations have answered ("partial" if they differ).
+        results = []
+        lock = threading.Lock()
+        
+        def finish(label, status, detail):
+            report(status, detail, f" to {label}" if len(destinations) > 1 else "")
+            with lock:
+                results.append(status)
+                done = len(results) == len(destinations)
+            if done:
+                self._journal_delivery(detection_id, results[0] if len(set(results)) == 1 else "partial")
+        
+        for label, url in destinations:
+            queued = dict(timing, queued=time.time()) # Stamped here, so the wait in the destination's queue counts as delivery
+            def deliver(label=label, url=url, queued=queued):
+                finish(label, *self._deliver(url, content, attachment, filename, detection_id=detection_id, timing=queued))
+            if self.outbox.submit(url, label, deliver):
+                continue
+            # This destination is badly backed up; queue behind its backlog in the spool instead of waiting
+            if self.spool is not None:
+                self.spool.put(url, content, attachment, filename, "alert", detection_id, queued)
+                finish(label, "spooled", "delivery queue full")
             else:
-                response = requests.post(webhook_url, json=payload) # Send without screenshot if disabled
+                finish(label, "failed", "delivery queue full")
+    
+    def _in_cooldown(self, notification_id, cooldown):
+        # True if this notification was already sent within the last cooldown seconds; records the send otherwise
+        current_time = self.clock()
+        if cooldown > 0 and current_time - self.last_notification_time.get(notification_id, 0) < cooldown:
+            return True
+        self.last_notification_time[notification_id] = current_time
+        return False
+    
+    def item_digest_loop(self, generation):
+        while self.worker_current("digest", generation):
+            self.watchdog.beat("digest")
+            # Sleep until the current window closes, until stop_detection asks for an early flush, or until the
+            # window length changes
+            window_end = self.item_digest.window_start + self.settings.item_digest_window
+            if self.item_digest_wakeup.wait(max(0.0, window_end - time.time())):
+                self.item_digest_wakeup.clear()
+            flush, self.item_digest_flush = self.item_digest_flush, False
+            if not flush and time.time() < self.item_digest.window_start + self.settings.item_digest_window:
+                continue # The window was lengthened, or not over yet under its new length
+            self.send_item_digest(*self.item_digest.take())
+    
+    def send_item_digest(self, window_start, window_end, counts):
+        # Each item's drops are summarised for the destinations its silent drops are routed to, one digest per destination
+        if not counts:
+            return
+        settings = self.settings
+        by_destination = {} # url -> (label, {item_name: count})
+        dropped = []
+        for item_name, count in counts.items():
+            rule = settings.rules.items.get(item_name)
+            destinations = self._destinations(rule, "silent", settings) if rule is not None else []
+            if not destinations:
+                dropped.append(item_name)
+            for label, url in destinations:
+                by_destination.setdefault(url, (label, {}))[1][item_name] = count
+        if dropped:
+            self.log_status(f"Item digest dropped {sum(counts[item_name] for item_name in dropped)} drops of "
+                            f"{', '.join(sorted(dropped))}: no webhook or destination for them")
+        
+        hours = max(window_end - window_start, 1.0) / 3600
+        header = f"📦 **Item Digest** ({datetime.fromtimestamp(window_start):%H:%M}–{datetime.fromtimestamp(window_end):%H:%M})"
+        for url, (label, destination_counts) in by_destination.items():
+            lines = [header]
+            length = len(header)
+            ranked = sorted(destination_counts.items(), key=lambda entry: (-entry[1], entry[0]))
+            for shown, (item_name, count) in enumerate(ranked):
+                line = f"🎁 {item_name} ×{count} ({count / hours:.1f}/h)"
+                if length + len(line) + 40 > 2000: # Stay under Discord's message limit
+                    lines.append(f"…and {len(ranked) - shown} more items")
+                    break
+                lines.append(line)
+                length += len(line) + 1
             
-            if response.status_code in [200, 204]:
-                self.log_status(f"Item notification sent: {item_name} ({mode}). Status: {response.status_code}")
+            target = f" to {label}" if len(by_destination) > 1 else ""
+            status, detail = self._deliver(url, "\n".join(lines))
+            if status == "sent":
+                self.log_status(f"Item digest sent{target}: {sum(destination_counts.values())} drops of {len(destination_counts)} items")
+            elif status == "spooled":
+                self.log_status(f"Item digest{target} queued for retry ({detail})")
             else:
-                self.log_status(f"Failed to send item notification: {response.status_code} - {response.text}")
+                self.log_status(f"Failed to send item digest{target}: {detail}")
+    
+    def _encode_png(self, image):
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+    
+    def _post_webhook(self, webhook_url, content, attachment=None, filename=None):
+        # Single place every webhook post goes through; attachment is image bytes of the type filename says
+        if attachment is not None:
+            filename = filename or "screenshot.png"
+            files = {'file': (filename, attachment, ATTACHMENT_TYPES.get(os.path.splitext(filename)[1].lower(), "image/png"))}
+            return self.http.post(webhook_url, data={"content": content}, files=files)
+        return self.http.post(webhook_url, json={"content": content})
+    
+    def _deliver(self, webhook_url, content, attachment=None, filename=None, kind="alert", detection_id=None, timing=None):
+        # Post now, or hand the notification to the spool when the endpoint is unreachable.
+        # Returns (status, detail) with status "sent", "spooled" or "failed".
+        # timing (stage timestamps plus the detection's "kind" and "key") is completed and recorded once acknowledged.
+        started = time.perf_counter()
+        status, detail = self._deliver_once(webhook_url, content, attachment, filename, kind, detection_id, timing)
+        self.outbox.record(webhook_url, status, time.perf_counter() - started)
+        return status, detail
+    
+    def _deliver_once(self, webhook_url, content, attachment, filename, kind, detection_id, timing):
+        if timing is not None:
+            timing.setdefault("queued", time.time()) # Already set when _fan_out queued it for a destination
+        if self.spool is not None and self.spool.has_pending(webhook_url):
+            # The endpoint already has a backlog; queue behind it instead of waiting on another failure
+            self.spool.put(webhook_url, content, attachment, filename, kind, detection_id, timing)
+            return "spooled", "webhook has undelivered backlog"
+        
+        try:
+            response = self._post_webhook(webhook_url, content, attachment, filename)
+            if response.status_code in [200, 204]:
+                self._record_latency(timing)
+                return "sent", str(response.status_code)
+            detail = f"{response.status_code} - {response.text}"
+            retryable = response.status_code == 429 or response.status_code >= 500
         except Exception as e:
-            self.log_status(f"Error sending item notification: {str(e)}")
+            detail = str(e)
+            retryable = True # Connection errors are exactly what the spool is for
+        
+        if retryable and self.spool is not None:
+            self.spool.put(webhook_url, content, attachment, filename, kind, detection_id, timing)
+            return "spooled", detail
+        return "failed", detail
+    
+    def _record_latency(self, timing):
+        if timing is not None:
+            timing["acked"] = time.time()
+            self.latency.record(timing["kind"], timing["key"], timing)
+    
+    def _report_latency(self):
+        # One line per stage over all detections, then the end-to-end latency per event and item
+        overall = self.latency.summary()
+        if not overall:
+            return
+        self.log_status("Detection latency (p50 / p95 / p99): " + ", ".join(
+            f"{stage} {values['p50'] * 1000:.0f} / {values['p95'] * 1000:.0f} / {values['p99'] * 1000:.0f} ms"
+            for stage, values in overall.items()))
+        for kind, key in self.latency.keys():
+            total = self.latency.summary(kind, key).get("total")
+            if total:
+                self.log_status(f"  {kind} {key}: {total['count']} delivered, capture to delivery "
+                                f"p50 {total['p50']:.1f}s / p95 {total['p95']:.1f}s / max {total['max']:.1f}s")
+    
+    def _report_http_stats(self):
+        stats = self.http.stats()
+        if not stats["requests"]:
+            return
+        self.log_status(f"Webhooks: {stats['requests']} requests ({stats['errors']} errors), "
+                        f"{stats['connections_opened']} connections opened, {stats['connections_reused']} reused, "
+                        f"latency avg {stats['latency_avg'] * 1000:.0f} ms / p95 {stats['latency_p95'] * 1000:.0f} ms")
+    
+    def _report_destinations(self):
+        destinations = self.outbox.stats()
+        if len(destinations) < 2:
+            return # The overall webhook line already covers a single destination
+        for label, stats in sorted(destinations.items()):
+            self.log_status(f"  {label}: {stats['sent']} sent, {stats['spooled']} spooled, {stats['failed']} failed, "
+                            f"latency avg {stats['latency_avg'] * 1000:.0f} ms / p95 {stats['latency_p95'] * 1000:.0f} ms, "
+                            f"up to {stats['max_pending']} waiting")
+    
+    def _on_spool_result(self, entry, status):
+        # Called from the spool replayer once a queued notification is resolved
+        self._journal_delivery(entry.get("detection_id"), status if status != "sent" else "sent_late")
+        if status == "sent":
+            self._record_latency(entry.get("timing"))
+            self.log_status(f"Delivered queued notification from {datetime.fromtimestamp(entry['ts']):%H:%M:%S}")
+        else:
+            self.log_status(f"Dropped queued notification from {datetime.fromtimestamp(entry['ts']):%H:%M:%S} ({status})")
     
     def log_status(self, message):
         timestamp = datetime.now().strftime("%H:%M:%S")
         log_message = f"[{timestamp}] {message}\n"
         
+        if self.root is None:
+            self.log_sink(log_message.rstrip("\n"))
+            return
         # Update status text widget in thread-safe manner
         self.root.after(0, self._update_status_text, log_message)
     
@@ -803,35 +3498,118 @@ class BeeSwarmNotifier:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load configuration: {str(e)}")
     
-    def save_config(self):
+    def save_config(self, *args, changed_fields=()):
         try:
-            # Update config with current values
-            self.config["event_webhook"] = self.event_webhook_var.get() if hasattr(self, 'event_webhook_var') else ""
-            self.config["item_webhook"] = self.item_webhook_var.get() if hasattr(self, 'item_webhook_var') else ""
-            self.config["screenshot_enabled"] = self.screenshot_var.get() if hasattr(self, 'screenshot_var') else True
-            self.config["theme"] = self.theme_var.get() if hasattr(self, 'theme_var') else "light"
-            self.config["always_on_top"] = self.always_on_top_var.get() if hasattr(self, 'always_on_top_var') else False
-            self.config["start_hotkey"] = self.start_hotkey_var.get() if hasattr(self, 'start_hotkey_var') else "f7"
-            self.config["stop_hotkey"] = self.stop_hotkey_var.get() if hasattr(self, 'stop_hotkey_var') else "f8"
-            self.config["scan_interval"] = self.scan_interval_var.get() if hasattr(self, 'scan_interval_var') else "3"
+            # Config keys and the GUI variables that hold their current values
+            config_vars = {
+                "event_webhook": "event_webhook_var",
+                "item_webhook": "item_webhook_var",
+                "screenshot_enabled": "screenshot_var",
+                "theme": "theme_var",
+                "always_on_top": "always_on_top_var",
+                "start_hotkey": "start_hotkey_var",
+                "stop_hotkey": "stop_hotkey_var",
+                "scan_interval": "scan_interval_var",
+                "screenshot_webhook": "screenshot_webhook_var",
+                "full_screenshot_interval": "full_screenshot_interval_var",
+                "full_screenshot_busy_policy": "full_screenshot_busy_policy_var",
+                "full_screenshot_mode": "full_screenshot_mode_var",
+                "timelapse_format": "timelapse_format_var",
+                "timelapse_frames": "timelapse_frames_var",
+                "timelapse_seconds": "timelapse_seconds_var",
+                "start_full_screenshot_hotkey": "start_full_screenshot_hotkey_var",
+                "stop_full_screenshot_hotkey": "stop_full_screenshot_hotkey_var",
+                "item_digest_enabled": "item_digest_enabled_var",
+                "item_digest_window": "item_digest_window_var",
+                "attachment_mode": "attachment_mode_var",
+                "alert_clip_enabled": "alert_clip_enabled_var",
+                "alert_clip_pre_seconds": "alert_clip_pre_seconds_var",
+                "alert_clip_post_seconds": "alert_clip_post_seconds_var",
+                "alert_clip_max_mb": "alert_clip_max_mb_var",
+                "profile_enabled": "profile_enabled_var",
+                "profile_seconds": "profile_seconds_var"
+            }
             
-            # New screenshot settings
-            self.config["screenshot_webhook"] = self.screenshot_webhook_var.get() if hasattr(self, 'screenshot_webhook_var') else ""
-            self.config["full_screenshot_interval"] = self.full_screenshot_interval_var.get() if hasattr(self, 'full_screenshot_interval_var') else "3"
-            self.config["start_full_screenshot_hotkey"] = self.start_full_screenshot_hotkey_var.get() if hasattr(self, 'start_full_screenshot_hotkey_var') else "f9"
-            self.config["stop_full_screenshot_hotkey"] = self.stop_full_screenshot_hotkey_var.get() if hasattr(self, 'stop_full_screenshot_hotkey_var') else "f10"
+            # Update config with current values, remembering which fields actually changed
+            dirty_fields = set(changed_fields)
+            for config_key, var_name in config_vars.items():
+                if hasattr(self, var_name):
+                    value = getattr(self, var_name).get()
+                    if self.config.get(config_key) != value:
+                        self.config[config_key] = value
+                        dirty_fields.add(config_key)
             
             # Update event settings
             if hasattr(self, 'event_vars'):
                 for event_key, var in self.event_vars.items():
-                    self.config["events"][event_key] = var.get()
+                    if self.config["events"].get(event_key) != var.get():
+                        self.config["events"][event_key] = var.get()
+                        dirty_fields.add("events")
             
-            # Save to file
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            # Hand off to the write-behind store; unchanged saves never touch the disk
+            if dirty_fields:
+                self.publish_settings()
+                if hasattr(self, 'config_store'):
+                    self.config_store.update(self.config, dirty_fields)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save configuration: {str(e)}")
     
+    def publish_settings(self):
+        # Swapping the reference is atomic, so worker threads can read self.settings without a lock
+        previous = getattr(self, "settings", None)
+        self.settings = DetectionSettings.from_config(self.config, self.rules)
+        if previous is not None and previous.item_digest_window != self.settings.item_digest_window and hasattr(self, "item_digest_wakeup"):
+            self.item_digest_wakeup.set() # The digest loop re-times its current window
+    
+    def load_rules(self):
+        # Read the rules file, writing the built-in rules first if it does not exist yet
+        if not os.path.exists(self.rules_file):
+            document = DetectionRules.default_document(self.event_definitions, self.event_patterns, self.bee_swarm_items)
+            with open(self.rules_file, 'w', encoding='utf-8') as f:
+                json.dump(document, f, indent=4)
+        try:
+            self.rules_mtime = os.stat(self.rules_file).st_mtime_ns
+            return DetectionRules.load(self.rules_file)
+        except Exception as e:
+            self.log_status(f"Failed to load {self.rules_file}, using built-in rules: {str(e)}")
+            return DetectionRules.from_document(
+                DetectionRules.default_document(self.event_definitions, self.event_patterns, self.bee_swarm_items))
+    
+    def rules_watch_loop(self, generation):
+        # Poll the rules file's modification time; a valid new version replaces the rules at runtime
+        while self.worker_current("rules", generation):
+            self.watchdog.beat("rules")
+            time.sleep(2)
+            try:
+                mtime = os.stat(self.rules_file).st_mtime_ns
+            except OSError:
+                continue
+            if mtime == self.rules_mtime:
+                continue
+            self.rules_mtime = mtime
+            try:
+                rules = DetectionRules.load(self.rules_file)
+            except Exception as e:
+                self.log_status(f"Rules file not reloaded: {str(e)}")
+                continue
+            if self.root is None:
+                self.apply_rules(rules)
+            else:
+                self.root.after(0, self.apply_rules, rules)
+    
+    def apply_rules(self, rules):
+        # Runs on the GUI thread: swap the rules in, recompile the matchers and refresh the lists
+        self.rules = rules
+        self.publish_settings()
+        if self.root is not None:
+            self.populate_events_list()
+            self.populate_items_tree()
+        self.log_status(f"Reloaded {self.rules_file}: {len(rules.events)} events, {len(rules.items)} items")
+    
+    def _on_config_write_error(self, error):
+        # Called from the config writer thread
+        self.log_status(f"Failed to save configuration: {str(error)}")
+    
     def run(self):
         # Save config on window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -842,9 +3620,26 @@ class BeeSwarmNotifier:
             self.stop_detection()
         if self.full_screenshot_running:
             self.stop_full_screenshot()
+        for thread in (self.capture_thread, self.detection_thread, self.full_screenshot_thread, self.full_screenshot_upload_thread):
+            if thread is not None:
+                thread.join(timeout=2) # Let an in-flight pass finish before the stores below close
         self.unbind_hotkeys() # Unbind hotkeys on closing
-        self.save_config()
+        self.save_config(changed_fields=tuple(self.config)) # Always persist the full config on exit
+        # Post the partial digest here rather than leaving it to the digest thread, which may not get to it before
+        # exit; take() hands the counts to only one of us
+        self.send_item_digest(*self.item_digest.take())
+        self.close_stores()
         self.root.destroy()
+    
+    def close_stores(self):
+        self.config_store.close() # Force the pending write before exiting
+        self._flush_event_clips(wait=10.0)
+        self.outbox.close() # Before the spool, which takes whatever could not be sent
+        if self.spool is not None:
+            self.spool.close()
+        self.http.close()
+        if self.journal:
+            self.journal.close()
 
     def bind_hotkeys(self):
         self.unbind_hotkeys() # Unbind existing hotkeys first
@@ -856,7 +3651,7 @@ class BeeSwarmNotifier:
 
         try:
             if start_key and not self.start_hotkey_bound:
-                keyboard.add_hotkey(start_key, self.start_detection)
+                keyboard.add_hotkey(start_key, self._on_gui_thread(self.start_detection))
                 self.start_hotkey_bound = True
                 self.log_status(f"Bound start hotkey: {start_key}")
         except Exception as e:
@@ -864,7 +3659,7 @@ class BeeSwarmNotifier:
 
         try:
             if stop_key and not self.stop_hotkey_bound:
-                keyboard.add_hotkey(stop_key, self.stop_detection)
+                keyboard.add_hotkey(stop_key, self._on_gui_thread(self.stop_detection))
                 self.stop_hotkey_bound = True
                 self.log_status(f"Bound stop hotkey: {stop_key}")
         except Exception as e:
@@ -872,7 +3667,7 @@ class BeeSwarmNotifier:
 
         try:
             if start_full_screenshot_key and not self.start_full_screenshot_hotkey_bound:
-                keyboard.add_hotkey(start_full_screenshot_key, self.start_full_screenshot)
+                keyboard.add_hotkey(start_full_screenshot_key, self._on_gui_thread(self.start_full_screenshot))
                 self.start_full_screenshot_hotkey_bound = True
                 self.log_status(f"Bound start full screenshot hotkey: {start_full_screenshot_key}")
         except Exception as e:
@@ -880,12 +3675,16 @@ class BeeSwarmNotifier:
 
         try:
             if stop_full_screenshot_key and not self.stop_full_screenshot_hotkey_bound:
-                keyboard.add_hotkey(stop_full_screenshot_key, self.stop_full_screenshot)
+                keyboard.add_hotkey(stop_full_screenshot_key, self._on_gui_thread(self.stop_full_screenshot))
                 self.stop_full_screenshot_hotkey_bound = True
                 self.log_status(f"Bound stop full screenshot hotkey: {stop_full_screenshot_key}")
         except Exception as e:
             self.log_status(f"Error binding stop full screenshot hotkey '{stop_full_screenshot_key}': {e}")
 
+    def _on_gui_thread(self, callback):
+        # Hotkeys fire on the keyboard hook's thread; run their handlers on the Tk thread so start/stop never race
+        return lambda: self.root.after(0, callback)
+
     def unbind_hotkeys(self):
         if self.start_hotkey_bound:
             start_key = self.config.get("start_hotkey", "f7")
@@ -932,6 +3731,7 @@ class BeeSwarmNotifier:
                 self.log_status(f"Error unbinding stop full screenshot hotkey '{stop_full_screenshot_key}': {e}")
 
     def start_full_screenshot(self):
+        self.full_screenshot_start_job = None
         if self.full_screenshot_running:
             return
 
@@ -940,68 +3740,200 @@ class BeeSwarmNotifier:
             messagebox.showwarning("Warning", "Please configure a screenshot webhook URL before starting full screenshots.")
             return
 
+        if self._previous_run_busy("Live Feed", (self.full_screenshot_thread, self.full_screenshot_upload_thread)):
+            if self.full_screenshot_start_job is None:
+                self.full_screenshot_start_job = self.root.after(50, self.start_full_screenshot)
+            return
+
+        self.full_screenshot_stop = threading.Event()
+        self.full_screenshot_ring = FrameRing(1, "latest")
+        self.full_screenshot_timelapse = self._make_timelapse()
+        self.full_screenshot_stats = {"started": time.monotonic(), "ticks": 0, "skipped": 0, "late": 0, "sent": 0, "failed": 0, "frames": 0}
         self.full_screenshot_running = True
         self.start_full_screenshot_button.configure(state="disabled")
         self.stop_full_screenshot_button.configure(state="normal")
         self.log_status("Full screenshot capture started.")
         self._update_screenshot_status("Running", "green")
         
-        self.full_screenshot_thread = threading.Thread(target=self.full_screenshot_loop, daemon=True)
-        self.full_screenshot_thread.start()
+        restart = lambda: setattr(self, "full_screenshot_thread", self.start_worker("live_feed", self.full_screenshot_loop))
+        self.watchdog.register("live_feed", lambda: self.settings.full_screenshot_interval, restart)
+        restart_upload = lambda: setattr(self, "full_screenshot_upload_thread", self.start_worker("live_feed_upload", self.full_screenshot_upload_loop))
+        self.watchdog.register("live_feed_upload", lambda: self.settings.full_screenshot_interval, restart_upload)
+        self.full_screenshot_thread = self.start_worker("live_feed", self.full_screenshot_loop)
+        self.full_screenshot_upload_thread = self.start_worker("live_feed_upload", self.full_screenshot_upload_loop)
+        self.start_profiler()
 
     def stop_full_screenshot(self):
+        if self.full_screenshot_start_job is not None:
+            self.root.after_cancel(self.full_screenshot_start_job)
+            self.full_screenshot_start_job = None
+        self.start_deadlines.pop("Live Feed", None)
         self.full_screenshot_running = False
+        self.full_screenshot_stop.set()
+        self.full_screenshot_ring.close()
+        self.watchdog.unregister("live_feed")
+        self.watchdog.unregister("live_feed_upload")
+        if self.profiler is not None and not self.detection_running:
+            self.profiler.stop()
         self.start_full_screenshot_button.configure(state="normal")
         self.stop_full_screenshot_button.configure(state="disabled")
         self.log_status("Full screenshot capture stopped.")
         self._update_screenshot_status("Stopped", "red")
+        if self.full_screenshot_timelapse is None:
+            self._report_live_feed_stats()
+        self._report_http_stats()
+        self._report_destinations()
 
-    def full_screenshot_loop(self):
+    def full_screenshot_loop(self, generation):
+        # Fixed-rate scheduler: captures on ticks of full_screenshot_interval, however long encoding and uploading take.
+        # A tick that finds the previous upload still in flight is skipped ("skip"), or its frame replaces the one
+        # waiting to go ("replace"), so slow uploads never pile up or push later ticks back.
+        stop = self.full_screenshot_stop
+        ring = self.full_screenshot_ring
+        stats = self.full_screenshot_stats
+        timelapse = self.full_screenshot_timelapse
+        next_due = time.monotonic()
+        while not stop.is_set() and self.worker_current("live_feed", generation):
+            self.watchdog.beat("live_feed")
+            settings = self.settings
+            interval = max(0.1, settings.full_screenshot_interval)
+            stats["ticks"] += 1
+            busy = self.full_screenshot_uploading.is_set() or ring.stats()["pending"]
+            if timelapse is not None:
+                # Every tick is kept; only the finished batch goes to the uploader
+                try:
+                    timelapse.add(ImageGrab.grab(), time.time())
+                    stats["frames"] += 1
+                except Exception as e:
+                    self.log_status(f"Full screenshot error: {str(e)}")
+                if timelapse.due(time.time()) and not busy:
+                    # While a batch is still waiting or uploading, frames keep collecting for the next one instead
+                    ring.put(timelapse.take(), time.time())
+            elif busy and settings.full_screenshot_busy_policy != "replace":
+                stats["skipped"] += 1
+            else:
+                try:
+                    ring.put(ImageGrab.grab(), time.time())
+                except Exception as e:
+                    self.log_status(f"Full screenshot error: {str(e)}")
+                    self._update_screenshot_status(f"Error: {e}", "red")
+            
+            next_due += interval
+            now = time.monotonic()
+            if next_due < now:
+                # Behind schedule (slow grab or a suspended machine): count the missed ticks and rejoin the grid
+                missed = int((now - next_due) / interval) + 1
+                stats["ticks"] += missed
+                stats["late"] += missed
+                next_due += missed * interval
+            stop.wait(next_due - now)
+    
+    def full_screenshot_upload_loop(self, generation):
+        # Consumer: encodes and sends the frames the scheduler captured, one at a time
+        stop = self.full_screenshot_stop
+        ring = self.full_screenshot_ring
+        stats = self.full_screenshot_stats
+        while not stop.is_set() and self.worker_current("live_feed_upload", generation):
+            self.watchdog.beat("live_feed_upload")
+            frame = ring.get(timeout=max(1.0, self.settings.full_screenshot_interval))
+            if frame is None:
+                continue
+            self.full_screenshot_uploading.set()
+            try:
+                sent = self.send_time_lapse(frame[0]) if isinstance(frame[0], list) else self.send_full_screenshot(frame[0])
+                stats["sent" if sent else "failed"] += 1
+            finally:
+                self.full_screenshot_uploading.clear()
+        timelapse = self.full_screenshot_timelapse
+        if stop.is_set() and timelapse is not None and self.worker_current("live_feed_upload", generation):
+            scheduler = self.full_screenshot_thread
+            if scheduler is not None and scheduler is not threading.current_thread():
+                scheduler.join(2) # So no batch is handed over after this flush
+            # A batch still waiting and the frames since the last post are sent together when the Live Feed stops
+            leftover = [frame for batch, _ in ring.drain() for frame in batch] + timelapse.take()
+            if leftover:
+                stats["sent" if self.send_time_lapse(leftover) else "failed"] += 1
+            self._report_live_feed_stats() # Here rather than in stop_full_screenshot, so the last post is counted
+    
+    def _make_timelapse(self):
+        if self.config.get("full_screenshot_mode", "single") != "timelapse":
+            return None
         try:
-            interval = float(self.full_screenshot_interval_var.get())
+            return TimeLapse(self.config.get("timelapse_format", "webp"), int(self.config.get("timelapse_frames", "10")),
+                             float(self.config.get("timelapse_seconds", "60")), int(self.config.get("timelapse_max_width", "640")))
         except ValueError:
-            interval = 3.0
-
-        while self.full_screenshot_running:
-            try:
-                screenshot = ImageGrab.grab()
-                self.send_full_screenshot(screenshot)
-                time.sleep(interval)
-            except Exception as e:
-                self.log_status(f"Full screenshot error: {str(e)}")
-                self._update_screenshot_status(f"Error: {e}", "red")
-                time.sleep(interval)
+            return TimeLapse(self.config.get("timelapse_format", "webp"))
+    
+    def _report_live_feed_stats(self):
+        # Achieved rate against the configured interval; skipped ticks mean uploads are slower than the interval
+        stats = self.full_screenshot_stats
+        if not stats.get("ticks"):
+            return
+        interval = max(0.1, self.settings.full_screenshot_interval)
+        elapsed = max(time.monotonic() - stats["started"], interval)
+        replaced = self.full_screenshot_ring.stats()["dropped"]
+        if self.full_screenshot_timelapse is not None:
+            self.log_status(f"Live Feed time-lapse: {stats['frames']} of {stats['ticks']} ticks captured in {elapsed:.0f}s "
+                            f"(target every {interval:g}s), sent as {stats['sent']} posts ({stats['failed']} failed)")
+            return
+        self.log_status(f"Live Feed: {stats['sent']} of {stats['ticks']} ticks sent in {elapsed:.0f}s, one every "
+                        f"{elapsed / stats['sent'] if stats['sent'] else 0:.1f}s (target {interval:g}s); {stats['skipped']} skipped "
+                        f"while uploading, {replaced} replaced, {stats['late']} missed while behind, {stats['failed']} failed")
 
     def send_full_screenshot(self, screenshot):
-        webhook_url = self.screenshot_webhook_var.get().strip()
+        webhook_url = self.settings.screenshot_webhook
         if not webhook_url:
             return
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        temp_file = f"full_screenshot_{timestamp}.png"
         
         try:
-            screenshot.save(temp_file)
-
-            with open(temp_file, 'rb') as f:
-                files = {'file': (temp_file, f, 'image/png')}
-                payload = {"content": f"📸 **Full Screenshot** ({timestamp})"}
-                response = requests.post(webhook_url, data=payload, files=files)
-
-            if response.status_code == 204:
+            content = f"📸 **Full Screenshot** ({timestamp})"
+            status, detail = self._deliver(webhook_url, content, self._encode_png(screenshot),
+                                           f"full_screenshot_{timestamp}.png", kind="live_feed")
+            if status == "sent":
                 self.log_status(f"Full screenshot sent at {timestamp}")
                 self._update_screenshot_status("Last sent: " + timestamp, "green")
+            elif status == "spooled":
+                self.log_status(f"Full screenshot queued for retry ({detail})")
+                self._update_screenshot_status("Queued for retry: " + timestamp, "orange")
             else:
-                self.log_status(f"Failed to send full screenshot: {response.status_code} - {response.text}")
-                self._update_screenshot_status("Send failed: " + str(response.status_code), "red")
+                self.log_status(f"Failed to send full screenshot: {detail}")
+                self._update_screenshot_status("Send failed: " + detail, "red")
+            return status != "failed"
         except Exception as e:
             self.log_status(f"Error saving or sending full screenshot: {str(e)}")
             self._update_screenshot_status("Error sending: " + str(e), "red")
-        finally:
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
+            return False
 
+    def send_time_lapse(self, frames):
+        webhook_url = self.settings.screenshot_webhook
+        if not webhook_url or not frames:
+            return False
+        
+        first, last = datetime.fromtimestamp(frames[0][1]), datetime.fromtimestamp(frames[-1][1])
+        try:
+            attachment, extension = self.full_screenshot_timelapse.encode(frames)
+            content = f"🎞️ **Time-lapse** ({first:%H:%M:%S}–{last:%H:%M:%S}, {len(frames)} frames)"
+            status, detail = self._deliver(webhook_url, content, attachment, f"timelapse_{first:%Y%m%d_%H%M%S}.{extension}", kind="live_feed")
+            if status == "sent":
+                self.log_status(f"Time-lapse of {len(frames)} frames sent ({len(attachment) / 1024:.0f} KB)")
+                self._update_screenshot_status(f"Last time-lapse: {last:%H:%M:%S}", "green")
+            elif status == "spooled":
+                self.log_status(f"Time-lapse queued for retry ({detail})")
+                self._update_screenshot_status(f"Queued for retry: {last:%H:%M:%S}", "orange")
+            else:
+                self.log_status(f"Failed to send time-lapse: {detail}")
+                self._update_screenshot_status("Send failed: " + detail, "red")
+            return status != "failed"
+        except Exception as e:
+            self.log_status(f"Error building or sending time-lapse: {str(e)}")
+            self._update_screenshot_status("Error sending: " + str(e), "red")
+            return False
+    
     def _update_screenshot_status(self, message, color):
+        if self.root is None:
+            return
         self.root.after(0, self.__update_screenshot_status_text, message, color)
 
     def __update_screenshot_status_text(self, message, color):
@@ -1011,11 +3943,670 @@ class BeeSwarmNotifier:
         self.screenshot_status_text.configure(foreground=color)
         self.screenshot_status_text.configure(state="disabled")
 
+def print_journal_stats(args):
+    # Read the config only for the journal location; the GUI is never started
+    journal_file = "bee_swarm_journal.db"
+    if os.path.exists("bee_swarm_config.json"):
+        with open("bee_swarm_config.json", 'r') as f:
+            journal_file = json.load(f).get("journal_file", journal_file)
+    if not os.path.exists(journal_file):
+        print(f"No detection journal found at {journal_file}")
+        return
+
+    journal = DetectionJournal(journal_file, read_only=True)
+    until = time.time()
+    since = until - args.hours * 3600
+    print(f"Detections from {datetime.fromtimestamp(since):%Y-%m-%d %H:%M} to {datetime.fromtimestamp(until):%Y-%m-%d %H:%M}")
+
+    if args.key:
+        for bucket_start, count in journal.count_series(args.key, since, until, int(args.bucket * 60)):
+            print(f"{datetime.fromtimestamp(bucket_start):%Y-%m-%d %H:%M}  {count:6d}  {args.key}")
+        return
+
+    rows = journal.drop_counts(since, until, kind=args.kind)
+    if not rows:
+        print("No detections in this range.")
+    for kind, key, count, quantity in rows:
+        print(f"{count:6d}  {count / args.hours:8.2f}/h  {quantity:7d} total  {kind:5s}  {key}")
+
+def process_rss_bytes():
+    # Resident set size of this process, or None where it cannot be read
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def process_handle_count():
+    # Open OS handles (Windows) or file descriptors (Linux), or None where they cannot be counted
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+        count = wintypes.DWORD()
+        if ctypes.windll.kernel32.GetProcessHandleCount(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(count)):
+            return count.value
+        return None
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+def soak_frames(frames_dir, rules, region_size, seed=1):
+    # Endless frames for the soak test: the recorded captures in frames_dir in a loop, or synthetic chat lines
+    if frames_dir:
+        paths = [os.path.join(frames_dir, name) for name in sorted(os.listdir(frames_dir))
+                 if os.path.splitext(name)[1].lower() in (".png", ".jpg", ".jpeg", ".bmp")]
+        if not paths:
+            raise ValueError(f"No captures in {frames_dir}")
+        while True:
+            for path in paths:
+                with Image.open(path) as image:
+                    yield image.convert("RGB")
+    try:
+        font = ImageFont.truetype("arial.ttf", 16)
+    except OSError:
+        font = ImageFont.load_default()
+    rng = random.Random(seed)
+    phrases = [rule.name for rule in rules.events.values()]
+    phrases += [f"You received {rng.randint(1, 25)} {name}" for name in sorted(rules.items)]
+    phrases += ["Honey: 1,234,567", "Pollen collected", "Backpack is full!", "Converted 50,000 pollen"]
+    width, height = region_size
+    while True:
+        image = Image.new("RGB", (width, height), (34, 34, 34))
+        draw = ImageDraw.Draw(image)
+        y = 8
+        while y < height - 24:
+            draw.text((10, y), rng.choice(phrases), fill=(255, 255, 255), font=font)
+            y += rng.randint(22, 34)
+        yield image
+
+def growth_trend(samples, field, warmup=0.2):
+    # Least-squares growth of one metric over the samples after warm-up, as (start, end) of the fitted line
+    points = [(sample["sim_hours"], sample[field]) for sample in samples[int(len(samples) * warmup):] if sample[field] is not None]
+    if len(points) < 3:
+        return None
+    mean_x = sum(x for x, y in points) / len(points)
+    mean_y = sum(y for x, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, y in points)
+    if spread == 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+    return mean_y + slope * (points[0][0] - mean_x), mean_y + slope * (points[-1][0] - mean_x)
+
+# metric field -> (label, unit, absolute and relative growth that both have to be reached to flag it).
+# Latency is timed on a shared machine, so it needs a larger move than the memory counters.
+SOAK_METRICS = {
+    "rss_mb": ("RSS", "MB", 5.0, 0.10),
+    "traced_mb": ("Python heap (tracemalloc)", "MB", 1.0, 0.10),
+    "threads": ("Threads", "", 1, 0.0),
+    "handles": ("Open handles", "", 5, 0.10),
+    "scan_p50_ms": ("Scan latency p50", "ms", 20.0, 0.25),
+    "scan_p95_ms": ("Scan latency p95", "ms", 50.0, 0.25),
+}
+
+def run_soak_test(args):
+    # Drive the detection pipeline headless against a stand-in webhook at an accelerated rate and look for
+    # anything that keeps growing: memory, threads, handles or per-scan latency
+    base_config = {}
+    if os.path.exists("bee_swarm_config.json"):
+        with open("bee_swarm_config.json", 'r') as f:
+            base_config = json.load(f)
+    frames_dir = os.path.abspath(args.soak) if args.soak else None
+    report_path = os.path.abspath(args.soak_report)
+    simulated_interval = args.soak_scan_interval
+    total_scans = int(args.soak_hours * 3600 / simulated_interval)
+    sample_every = max(1, min(total_scans, int(args.soak_sample_minutes * 60 / simulated_interval)))
+
+    stand_in = StandInWebhookServer(keep_received=False).start() # A growing post list would look like a leak
+    workdir = tempfile.mkdtemp(prefix="bssn_soak_")
+    original_cwd = os.getcwd()
+    os.chdir(workdir) # Config, rules, journal and spool all live in the scratch directory
+    log_counts = {"lines": 0, "errors": 0}
+    def log_sink(message):
+        log_counts["lines"] += 1
+        if "error" in message.lower() or "failed" in message.lower():
+            log_counts["errors"] += 1
+            if log_counts["errors"] <= 20:
+                print(f"  {message}")
+    try:
+        rules_source = base_config.get("rules_file", "bssn_rules.json")
+        if not os.path.isabs(rules_source):
+            rules_source = os.path.join(original_cwd, rules_source)
+        if os.path.exists(rules_source):
+            shutil.copy(rules_source, "bssn_rules.json")
+        config = {key: base_config[key] for key in ("ocr_region", "ocr_profile", "ocr_min_confidence", "ocr_retry_low_confidence",
+                                                    "ocr_cache_size", "ocr_band_threshold", "attachment_mode", "crop_margin",
+                                                    "crop_upscale", "color_mask_enabled", "color_mask_palette",
+                                                    "color_mask_tolerance", "color_mask_min_ink") if key in base_config}
+        config.update({"event_webhook": stand_in.url, "item_webhook": stand_in.url, "screenshot_enabled": True,
+                       "scan_interval": str(simulated_interval), "rules_file": "bssn_rules.json"})
+        with open("bee_swarm_config.json", 'w') as f:
+            json.dump(config, f)
+
+        tracemalloc.start(10)
+        app = BeeSwarmNotifier(headless=True, log_sink=log_sink)
+        # Every rule on; items alternate between notify and silent so both paths run
+        app.config["events"] = {key: True for key in app.rules.events}
+        app.config["items"] = {name: ("notify" if index % 2 else "silent") for index, name in enumerate(sorted(app.rules.items))}
+        app.config["item_digest_enabled"] = True
+        app.publish_settings()
+        simulated_now = [time.time()]
+        app.clock = lambda: simulated_now[0]
+
+        profiler = None
+        if args.profile:
+            profiler = SamplingProfiler(("MainThread",), duration=args.profile).start() # The soak scans on the main thread
+        region = app.settings.ocr_region
+        frames = soak_frames(frames_dir, app.rules, (region[2] - region[0], region[3] - region[1]))
+        print(f"Soak test: {total_scans} scans = {args.soak_hours:g} simulated hours at one scan per {simulated_interval:g}s, "
+              f"webhook {stand_in.url}, {'captures from ' + frames_dir if frames_dir else 'synthetic frames'}")
+
+        samples = []
+        scan_seconds = []
+        baseline_snapshot = None
+        started = time.perf_counter()
+        for scan in range(1, total_scans + 1):
+            screenshot = next(frames)
+            scan_started = time.perf_counter()
+            captured_at = time.time()
+            try:
+                lines = app.read_confident_lines(screenshot, app.settings)
+                app.process_detected_text(lines, screenshot, {"captured": captured_at, "ocr_done": time.time()})
+            except Exception as e:
+                log_sink(f"Scan error: {e}")
+            scan_seconds.append(time.perf_counter() - scan_started)
+            simulated_now[0] += simulated_interval
+
+            if scan % sample_every == 0: # Whole windows only, so latency percentiles are comparable
+                scan_seconds.sort()
+                sample = {
+                    "scan": scan,
+                    "sim_hours": scan * simulated_interval / 3600,
+                    "rss_mb": (lambda rss: rss / 1048576 if rss is not None else None)(process_rss_bytes()),
+                    "traced_mb": tracemalloc.get_traced_memory()[0] / 1048576,
+                    "threads": threading.active_count(),
+                    "handles": process_handle_count(),
+                    "scan_p50_ms": scan_seconds[len(scan_seconds) // 2] * 1000,
+                    "scan_p95_ms": scan_seconds[min(len(scan_seconds) - 1, int(len(scan_seconds) * 0.95))] * 1000,
+                }
+                samples.append(sample)
+                scan_seconds = []
+                if baseline_snapshot is None and sample["sim_hours"] >= args.soak_hours * 0.2:
+                    baseline_snapshot = tracemalloc.take_snapshot() # After warm-up, so caches that fill once are not blamed
+                print(f"  {sample['sim_hours']:7.2f}h  rss {sample['rss_mb'] or 0:7.1f} MB  heap {sample['traced_mb']:6.1f} MB  "
+                      f"threads {sample['threads']:3d}  handles {sample['handles'] or 0:5d}  "
+                      f"scan p50 {sample['scan_p50_ms']:6.1f} ms  p95 {sample['scan_p95_ms']:6.1f} ms")
+
+        if profiler is not None:
+            profiler.stop()
+            profiler.join()
+            profile_paths = profiler.write(os.path.join(original_cwd, base_config.get("profile_dir", "bssn_profiles")), "soak_profile")
+        final_snapshot = tracemalloc.take_snapshot()
+        top_allocators = []
+        if baseline_snapshot is not None:
+            for stat in final_snapshot.compare_to(baseline_snapshot, "lineno")[:10]:
+                frame = stat.traceback[0]
+                top_allocators.append({"location": f"{frame.filename}:{frame.lineno}", "size_diff_kb": stat.size_diff / 1024, "count_diff": stat.count_diff})
+        app.close_stores()
+        tracemalloc.stop()
+    finally:
+        os.chdir(original_cwd)
+        stand_in.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    flagged = []
+    trends = {}
+    for field, (label, unit, min_growth, min_relative) in SOAK_METRICS.items():
+        trend = growth_trend(samples, field)
+        if trend is None:
+            continue
+        start, end = trend
+        growth = end - start
+        relative = growth / start if start > 0 else 0.0
+        trends[field] = {"start": start, "end": end, "growth": growth, "relative": relative,
+                         "flagged": growth >= min_growth and relative >= min_relative}
+        if trends[field]["flagged"]:
+            flagged.append(f"{label} grew from {start:.1f} to {end:.1f}{(' ' + unit) if unit else ''} ({relative:+.0%})")
+
+    wall_seconds = time.perf_counter() - started
+    print(f"\nSoak finished: {total_scans} scans in {wall_seconds:.0f}s wall time, {stand_in.received_count} webhook posts, "
+          f"{log_counts['errors']} errors in {log_counts['lines']} log lines")
+    latency = app.latency.report()
+    if latency["overall"]:
+        print("Detection latency, capture to webhook acknowledgement (p50 / p95 / p99):")
+        for stage, values in latency["overall"].items():
+            print(f"  {stage:9s} {values['p50'] * 1000:8.1f} / {values['p95'] * 1000:8.1f} / {values['p99'] * 1000:8.1f} ms  ({values['count']} detections)")
+    if top_allocators:
+        print("Top allocation growth after warm-up:")
+        for entry in top_allocators:
+            print(f"  {entry['size_diff_kb']:+10.1f} KB  {entry['count_diff']:+7d} blocks  {entry['location']}")
+    if flagged:
+        print("Growth trends flagged:")
+        for line in flagged:
+            print(f"  ! {line}")
+    else:
+        print("No metric shows a growth trend.")
+
+    with open(report_path, 'w') as f:
+        json.dump({"scans": total_scans, "simulated_hours": args.soak_hours, "scan_interval": simulated_interval,
+                   "wall_seconds": wall_seconds, "webhook_posts": stand_in.received_count, "log_errors": log_counts["errors"],
+                   "samples": samples, "latency": latency, "trends": trends, "flagged": flagged, "top_allocators": top_allocators}, f, indent=2)
+    print(f"Report written to {report_path}")
+    if profiler is not None:
+        print(f"Profile written to {profile_paths[0]} (collapsed stacks: {profile_paths[1]})")
+    return not flagged
+
+def stand_in_options(args):
+    # StandInWebhookServer keyword arguments from the --stand-in-* flags
+    return {"latency": args.stand_in_latency / 1000, "jitter": args.stand_in_jitter / 1000,
+            "success_status": args.stand_in_status, "error_rate": args.stand_in_error_rate,
+            "rate_limit": args.stand_in_rate_limit, "rate_window": args.stand_in_rate_window}
+
+def run_load_test(args):
+    # Push notifications through the real send paths (events and items with screenshots, digests as plain JSON,
+    # Live Feed screenshots) into a stand-in webhook from several threads, then report sender throughput,
+    # send latency and how failures and rate limits were handled, including what the spool delivered afterwards
+    base_config = {}
+    if os.path.exists("bee_swarm_config.json"):
+        with open("bee_swarm_config.json", 'r') as f:
+            base_config = json.load(f)
+    report_path = os.path.abspath(args.load_report)
+
+    stand_in = StandInWebhookServer(keep_received=False, seed=1, **stand_in_options(args)).start()
+    workdir = tempfile.mkdtemp(prefix="bssn_load_")
+    original_cwd = os.getcwd()
+    os.chdir(workdir) # Config, rules, journal and spool all live in the scratch directory
+    spool_results = {"sent": 0, "dropped": 0}
+    def log_sink(message):
+        if "Delivered queued notification" in message:
+            spool_results["sent"] += 1
+        elif "Dropped queued notification" in message:
+            spool_results["dropped"] += 1
+    try:
+        rules_source = base_config.get("rules_file", "bssn_rules.json")
+        if not os.path.isabs(rules_source):
+            rules_source = os.path.join(original_cwd, rules_source)
+        if os.path.exists(rules_source):
+            shutil.copy(rules_source, "bssn_rules.json")
+        config = {key: base_config[key] for key in ("attachment_mode", "crop_margin", "crop_upscale") if key in base_config}
+        # One path per slot, so rate limits apply per webhook as on Discord
+        config.update({"event_webhook": stand_in.url + "/event", "item_webhook": stand_in.url + "/item",
+                       "screenshot_webhook": stand_in.url + "/live", "screenshot_enabled": True, "rules_file": "bssn_rules.json"})
+        with open("bee_swarm_config.json", 'w') as f:
+            json.dump(config, f)
+
+        app = BeeSwarmNotifier(headless=True, log_sink=log_sink)
+        ticks = iter(range(1, 1 << 62))
+        app.clock = lambda: next(ticks) * 86400.0 # Every send is a day apart, so no cooldown suppresses it
+        events, items = sorted(app.rules.events), sorted(app.rules.items)
+        screenshot = Image.effect_noise((800, 450), 48).convert("RGB") # Noise is the worst case for PNG size, so attachment costs are an upper bound
+
+        outcomes = {} # (path, status) -> count
+        send_seconds = []
+        lock = threading.Lock()
+        deliver = app._deliver
+        def counted_deliver(*deliver_args, **deliver_kwargs):
+            status, detail = deliver(*deliver_args, **deliver_kwargs)
+            path = (deliver_kwargs.get("timing") or {}).get("kind") or deliver_kwargs.get("kind", "digest")
+            with lock:
+                outcomes[(path, status)] = outcomes.get((path, status), 0) + 1
+            return status, detail
+        app._deliver = counted_deliver
+
+        def send(index):
+            choice = index % 4
+            if choice == 0 and events:
+                key = events[index % len(events)]
+                app.send_event_notification(key, app.rules.events[key].name, screenshot)
+            elif choice == 1 and items:
+                name = items[index % len(items)]
+                app.send_item_notification(name, "notify" if index % 2 else "silent", name, screenshot, quantity=1 + index % 3)
+            elif choice == 2 and items:
+                now = time.time()
+                app.send_item_digest(now - 3600, now, {name: 1 + (index + n) % 5 for n, name in enumerate(items[:20])})
+            else:
+                app.send_full_screenshot(screenshot)
+
+        next_index = iter(range(args.load_count))
+        def sender():
+            for index in next_index:
+                started = time.perf_counter()
+                send(index)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    send_seconds.append(elapsed)
+
+        print(f"Load test: {args.load_count} notifications from {args.load_concurrency} threads to {stand_in.url} "
+              f"(latency {args.stand_in_latency:g} ms, errors {args.stand_in_error_rate:.0%}, "
+              f"rate limit {args.stand_in_rate_limit or 'off'}{f' per {args.stand_in_rate_window:g}s' if args.stand_in_rate_limit else ''})")
+        started = time.perf_counter()
+        senders = [threading.Thread(target=sender, name=f"load-{n}") for n in range(args.load_concurrency)]
+        for thread in senders:
+            thread.start()
+        for thread in senders:
+            thread.join()
+        app.outbox.wait_idle(args.load_drain_seconds) # Event and item sends only queue the post
+        send_wall = time.perf_counter() - started
+
+        # Let the spool work off what was queued for retry
+        drain_deadline = time.monotonic() + args.load_drain_seconds
+        urls = (config["event_webhook"], config["item_webhook"], config["screenshot_webhook"])
+        while app.spool is not None and any(app.spool.has_pending(url) for url in urls) and time.monotonic() < drain_deadline:
+            time.sleep(0.1)
+        total_wall = time.perf_counter() - started
+        undelivered = sum(1 for url in urls if app.spool is not None and app.spool.has_pending(url))
+        http_stats = app.http.stats()
+        destination_stats = app.outbox.stats()
+        delivery = app.latency.summary().get("delivery", {})
+        app.close_stores()
+    finally:
+        os.chdir(original_cwd)
+        stand_in.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    send_seconds.sort()
+    def percentile(share):
+        return send_seconds[min(len(send_seconds) - 1, int(len(send_seconds) * share))] if send_seconds else 0.0
+    sent_now = sum(count for (path, status), count in outcomes.items() if status == "sent")
+    spooled = sum(count for (path, status), count in outcomes.items() if status == "spooled")
+    failed = sum(count for (path, status), count in outcomes.items() if status == "failed")
+    lost = failed + spool_results["dropped"] + max(0, spooled - spool_results["sent"] - spool_results["dropped"])
+
+    print(f"\nSent {len(send_seconds)} notifications in {send_wall:.2f}s: {len(send_seconds) / send_wall if send_wall else 0:.1f}/s")
+    print(f"Send call time (event and item calls return once queued): p50 {percentile(0.5) * 1000:.0f} ms, p95 {percentile(0.95) * 1000:.0f} ms, "
+          f"p99 {percentile(0.99) * 1000:.0f} ms, max {percentile(1.0) * 1000:.0f} ms")
+    print(f"HTTP: {http_stats['requests']} requests ({http_stats['errors']} connection errors), "
+          f"{http_stats['connections_opened']} connections opened, latency avg {http_stats['latency_avg'] * 1000:.0f} ms / "
+          f"p95 {http_stats['latency_p95'] * 1000:.0f} ms")
+    print("Stand-in answered: " + ", ".join(f"{status} x{count}" for status, count in sorted(stand_in.status_counts.items())))
+    print(f"Outcomes: {sent_now} sent at once, {spooled} spooled ({spool_results['sent']} delivered later, "
+          f"{spool_results['dropped']} dropped), {failed} failed")
+    for (path, status), count in sorted(outcomes.items()):
+        print(f"  {path:10} {status:8} {count}")
+    for label, stats in sorted(destination_stats.items()):
+        print(f"Destination {label}: {stats['sent']} sent, {stats['spooled']} spooled, {stats['failed']} failed, "
+              f"latency avg {stats['latency_avg'] * 1000:.0f} ms / p95 {stats['latency_p95'] * 1000:.0f} ms, up to {stats['max_pending']} waiting")
+    if delivery:
+        print(f"Queued to acknowledged: p50 {delivery['p50'] * 1000:.0f} ms, p95 {delivery['p95'] * 1000:.0f} ms, max {delivery['max']:.1f}s")
+    if undelivered:
+        print(f"Spool still had undelivered notifications after {args.load_drain_seconds:g}s")
+    print(f"{lost} notifications not delivered" if lost else f"Every notification was delivered ({total_wall:.1f}s including retries)")
+
+    report = {"notifications": len(send_seconds), "concurrency": args.load_concurrency, "send_wall_seconds": send_wall,
+              "total_wall_seconds": total_wall, "throughput_per_second": len(send_seconds) / send_wall if send_wall else 0.0,
+              "send_latency_ms": {"p50": percentile(0.5) * 1000, "p95": percentile(0.95) * 1000,
+                                  "p99": percentile(0.99) * 1000, "max": percentile(1.0) * 1000},
+              "http": http_stats, "destinations": destination_stats, "stand_in_statuses": {str(status): count for status, count in stand_in.status_counts.items()},
+              "outcomes": {f"{path}/{status}": count for (path, status), count in outcomes.items()},
+              "spool": spool_results, "lost": lost, "stand_in": stand_in_options(args)}
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {report_path}")
+    return lost == 0
+
+def run_spool_test(args):
+    # Exercises OutboundSpool against a stand-in webhook that is made to fail on demand: event, item and Live Feed
+    # posts with attachments are queued during an outage, then checked for backoff, replay order after recovery,
+    # survival across a restart, the size cap (Live Feed evicted first) and age expiry. True when every check passes.
+    failures = []
+    def check(name, passed, detail=""):
+        print(f"  {'PASS' if passed else 'FAIL'}  {name}{f' ({detail})' if detail and not passed else ''}")
+        if not passed:
+            failures.append(name)
+
+    attempts = {} # path -> [(monotonic time, status)]
+    def on_request(path, status, size):
+        attempts.setdefault(path, []).append((time.monotonic(), status))
+    stand_in = StandInWebhookServer(on_request=on_request).start()
+    http = WebhookClient(connect_timeout=2.0, read_timeout=5.0)
+    def send(url, content, attachment=None, filename=None):
+        # Same request shapes as BeeSwarmNotifier._post_webhook
+        if attachment is not None:
+            files = {'file': (filename, attachment, ATTACHMENT_TYPES.get(os.path.splitext(filename)[1].lower(), "image/png"))}
+            return http.post(url, data={"content": content}, files=files)
+        return http.post(url, json={"content": content})
+
+    results = [] # (content, status) from on_result
+    def on_result(entry, status):
+        results.append((entry["content"], status))
+
+    def wait_until(condition, timeout):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return condition()
+
+    workdir = tempfile.mkdtemp(prefix="bssn_spool_test_")
+    buffer = io.BytesIO()
+    Image.effect_noise((64, 32), 48).convert("RGB").save(buffer, format="PNG")
+    png = buffer.getvalue()
+    urls = {"event": stand_in.url + "/event", "item": stand_in.url + "/item", "live_feed": stand_in.url + "/live"}
+    try:
+        print("Outage, backoff and replay order")
+        stand_in.fail(503)
+        spool = OutboundSpool(os.path.join(workdir, "outage"), send, base_delay=0.2, max_delay=2.0, on_result=on_result)
+        queued = []
+        for index in range(3):
+            for kind, filename in (("event", "event_screenshot.png"), ("item", "item_screenshot.png"), ("live_feed", "full_screenshot.png")):
+                content = f"{kind} {index}"
+                spool.put(urls[kind], content, png, filename, "live_feed" if kind == "live_feed" else "alert")
+                queued.append((kind, content))
+        time.sleep(3.0)
+        event_attempts = [at for at, status in attempts.get("/webhook/event", [])]
+        gaps = [later - earlier for earlier, later in zip(event_attempts, event_attempts[1:])]
+        check("failed posts stay queued", len(spool) == len(queued), f"{len(spool)} of {len(queued)} pending")
+        check("retries back off exponentially", len(gaps) >= 2 and all(later > earlier * 1.2 for earlier, later in zip(gaps, gaps[1:])),
+              "gaps " + ", ".join(f"{gap:.2f}s" for gap in gaps))
+        check("only the oldest post per webhook is retried", len(event_attempts) <= 6, f"{len(event_attempts)} attempts")
+
+        print("Restart during the outage")
+        spool.close()
+        spool = OutboundSpool(os.path.join(workdir, "outage"), send, base_delay=0.2, max_delay=2.0, on_result=on_result)
+        check("queued posts survive a restart", len(spool) == len(queued), f"{len(spool)} of {len(queued)} reloaded")
+
+        print("Recovery")
+        received_before = len(stand_in.received)
+        stand_in.recover()
+        check("backlog drains after recovery", wait_until(lambda: len(spool) == 0, 15.0), f"{len(spool)} still pending")
+        delivered = stand_in.received[received_before:]
+        for kind, url in urls.items():
+            path = urlparse(url).path
+            expected = [content for queued_kind, content in queued if queued_kind == kind]
+            actual = [post["content"] for post in delivered if post["path"] == path]
+            check(f"{kind} posts replayed in order", actual == expected, f"got {actual}")
+        check("attachments replayed intact", all(len(post["files"]) == 1 and post["files"][0][1] == len(png) for post in delivered),
+              "missing or resized attachment")
+        check("every post reported as sent", sorted(content for content, status in results if status == "sent") ==
+              sorted(content for _, content in queued))
+        spool.close()
+
+        print("Size cap")
+        results.clear()
+        stand_in.fail(503)
+        entry_size = len(png) + len("event old")
+        capped = OutboundSpool(os.path.join(workdir, "capped"), send, max_bytes=3 * entry_size + 4, base_delay=60.0, on_result=on_result)
+        capped.put(urls["event"], "event old", png, "event_screenshot.png")
+        capped.put(urls["live_feed"], "live old", png, "full_screenshot.png", "live_feed")
+        capped.put(urls["item"], "item old", png, "item_screenshot.png")
+        capped.put(urls["event"], "event new", png, "event_screenshot.png")
+        evicted = [content for content, status in results if status == "evicted"]
+        check("Live Feed posts are evicted first", evicted == ["live old"], f"evicted {evicted}")
+        capped.put(urls["item"], "item new", png, "item_screenshot.png")
+        evicted = [content for content, status in results if status == "evicted"]
+        check("then the oldest alert", evicted == ["live old", "event old"], f"evicted {evicted}")
+        check("spool stays under its cap", capped._total_bytes <= capped.max_bytes)
+        capped.close()
+
+        print("Age expiry")
+        results.clear()
+        aged = OutboundSpool(os.path.join(workdir, "aged"), send, max_age=0.5, base_delay=0.2, on_result=on_result)
+        aged.put(urls["event"], "event stale", png, "event_screenshot.png")
+        check("posts older than max_age expire", wait_until(lambda: ("event stale", "expired") in results, 3.0), f"results {results}")
+        check("expired attachments are deleted", not [name for name in os.listdir(aged.directory) if name.endswith(".bin")])
+        aged.close()
+        stand_in.recover()
+    finally:
+        stand_in.stop()
+        http.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'All spool checks passed' if not failures else f'{len(failures)} spool checks failed'}")
+    return not failures
+
+def run_rules_test(args):
+    # Checks CombinedMatcher against searching every rule alone, which is what it has to reproduce: rules that match
+    # at the same place, greedy patterns sharing a line, patterns that cannot share the combined regex, and the
+    # rules file in use (bssn_rules.json) on a set of chat lines. True when every check passes.
+    failures = []
+    def check(name, passed, detail=""):
+        print(f"  {'PASS' if passed else 'FAIL'}  {name}{f' ({detail})' if detail and not passed else ''}")
+        if not passed:
+            failures.append(name)
+
+    def searched_alone(rules, line):
+        return [rule.key for rule in rules
+                if any(re.search(pattern, line) for pattern in rule.patterns) or any(keyword in line for keyword in rule.keywords)]
+
+    def compare(name, document, lines):
+        try:
+            rules = list(DetectionRules.from_document(document).events.values())
+            matcher = CombinedMatcher(rules)
+        except Exception as e:
+            check(name, False, str(e))
+            return
+        for line in lines:
+            found = [rule.key for rule, match in matcher.find(line)]
+            expected = searched_alone(rules, line)
+            if sorted(found) != sorted(expected):
+                check(name, False, f"{line!r}: {found} instead of {expected}")
+                return
+        check(name, True)
+
+    def event(*patterns, keywords=()):
+        return {"patterns": list(patterns), "keywords": list(keywords)}
+
+    print("Rules that match at the same place")
+    compare("a keyword inside a pattern's match", {"events": {"meteor_shower": event(r"meteor.*shower"), "meteor": event(keywords=["meteor"])}},
+            ["a meteor shower has started", "meteor incoming", "shower time"])
+    compare("two patterns from the same start", {"events": {"storm": event(r"a honeystorm"), "summoned": event(r"a honeystorm has been summoned")}},
+            ["a honeystorm has been summoned!", "a honeystorm"])
+
+    print("Greedy patterns sharing a line")
+    compare("trailing and leading .*", {"events": {"sprout": event(r"a .* sprout has appeared.*|.* has planted .* sprout.*"),
+                                                   "mondo_chicken": event(r"mondo chick has spawned.*"),
+                                                   "stick_bug": event(r"started the stick bug challenge.*")}},
+            ["mondo chick has spawned! bob has planted a rare sprout", "bob has planted a sprout; mondo chick has spawned",
+             "mondo chick has spawned and bob started the stick bug challenge"])
+
+    print("Patterns that cannot share the combined regex")
+    compare("inline flags", {"events": {"vicious": event(r"(?i)vicious bee"), "windy": event(r"windy bee")}},
+            ["a vicious bee and a windy bee", "windy bee"])
+    compare("numbered backreference", {"events": {"twice": event(r"(\w+) bee \1"), "before": event(r"(a)(b)"), "windy": event(r"windy bee")}},
+            ["windy bee windy", "ab windy bee", "a bee b"])
+    compare("the same group name in two rules", {"events": {"planted": event(r"(?P<who>\w+) has planted"), "summoned": event(r"(?P<who>\w+) has summoned")}},
+            ["bob has planted a sprout and alice has summoned a honeystorm", "alice has summoned a honeystorm"])
+
+    if os.path.exists("bssn_rules.json"):
+        print("Rules in bssn_rules.json")
+        with open("bssn_rules.json", encoding="utf-8") as f:
+            document = json.load(f)
+        lines = ["a rare sprout has appeared in the field", "bob has planted a moon sprout", "mondo chick has spawned!",
+                 "a honeystorm has been summoned!", "puffshroom spawned", "meteor shower incoming", "found a windy bee",
+                 "vicious bee is attacking", "alice started the stick bug challenge", "you received 3 treats"]
+        lines += [f"{first} {second}" for first in lines for second in lines if first != second]
+        compare("every line and every pair of lines", document, lines)
+
+    print(f"\n{'All rule checks passed' if not failures else f'{len(failures)} rule checks failed'}")
+    return not failures
+
 if __name__ == "__main__":
     # Note: This application requires the following dependencies:
     # pip install pillow pytesseract requests
     # You'll also need to install Tesseract OCR on your system
     
+    parser = argparse.ArgumentParser(description="Bee Swarm Smart Notifier")
+    parser.add_argument("--journal-stats", action="store_true", help="Print detection counts from the local journal and exit")
+    parser.add_argument("--hours", type=float, default=24, help="Time range for --journal-stats, counting back from now (default: 24)")
+    parser.add_argument("--kind", choices=["event", "item"], help="Only count events or items")
+    parser.add_argument("--key", help="Show a time series for one event key or item name")
+    parser.add_argument("--bucket", type=float, default=60, help="Bucket size in minutes for --key (default: 60)")
+    parser.add_argument("--tune", metavar="CAPTURES_DIR", help="Benchmark Tesseract settings on labelled captures and save the best profile to the config")
+    parser.add_argument("--learn-palette", metavar="CAPTURES_DIR", help="Learn the notification text colours from region captures and switch the color mask on")
+    parser.add_argument("--stand-in-webhook", type=int, metavar="PORT", help="Run a local stand-in webhook server on PORT and exit on Ctrl+C")
+    parser.add_argument("--stand-in-latency", type=float, default=0, metavar="MS", help="Stand-in: delay before every reply (default: 0)")
+    parser.add_argument("--stand-in-jitter", type=float, default=0, metavar="MS", help="Stand-in: up to this much extra random delay (default: 0)")
+    parser.add_argument("--stand-in-status", type=int, choices=[200, 204], default=204, help="Stand-in: success status (default: 204, 200 for ?wait=true)")
+    parser.add_argument("--stand-in-error-rate", type=float, default=0, metavar="SHARE", help="Stand-in: share of posts answered with a 5xx (default: 0)")
+    parser.add_argument("--stand-in-rate-limit", type=int, default=0, metavar="N", help="Stand-in: answer 429 after N posts per webhook per window (default: off)")
+    parser.add_argument("--stand-in-rate-window", type=float, default=2, metavar="SECONDS", help="Stand-in: rate limit window (default: 2)")
+    parser.add_argument("--load-test", action="store_true", help="Benchmark the webhook senders against a stand-in webhook and exit")
+    parser.add_argument("--load-count", type=int, default=400, help="Notifications to send in --load-test (default: 400)")
+    parser.add_argument("--load-concurrency", type=int, default=4, help="Sending threads in --load-test (default: 4)")
+    parser.add_argument("--load-drain-seconds", type=float, default=60, help="How long --load-test waits for the spool to deliver retries (default: 60)")
+    parser.add_argument("--load-report", default="bssn_load_report.json", help="Where --load-test writes its JSON report")
+    parser.add_argument("--spool-test", action="store_true", help="Check the outbound spool against a failing stand-in webhook and exit")
+    parser.add_argument("--rules-test", action="store_true", help="Check the combined rule matcher against searching each rule alone and exit")
+    parser.add_argument("--soak", nargs="?", const="", metavar="FRAMES_DIR", help="Run the headless soak test on recorded captures (or synthetic frames) and report growth trends")
+    parser.add_argument("--soak-hours", type=float, default=24, help="Simulated hours for --soak (default: 24)")
+    parser.add_argument("--soak-scan-interval", type=float, default=3, help="Simulated seconds between scans for --soak (default: 3)")
+    parser.add_argument("--soak-sample-minutes", type=float, default=30, help="Simulated minutes between --soak samples (default: 30)")
+    parser.add_argument("--profile", type=float, nargs="?", const=float("inf"), metavar="SECONDS",
+                        help="With --soak: sample the scan's call stacks (for SECONDS, default the whole run) and write a report and a flamegraph stacks file")
+    parser.add_argument("--soak-report", default="bssn_soak_report.json", help="Where --soak writes its JSON report")
+    args = parser.parse_args()
+    if args.profile is not None and args.soak is None:
+        parser.error("--profile only works with --soak; for the GUI, turn on profiling in the Settings tab")
+    
+    if args.journal_stats:
+        print_journal_stats(args)
+        raise SystemExit(0)
+    
+    if args.tune:
+        tune_ocr_profile(args.tune, "bee_swarm_config.json")
+        raise SystemExit(0)
+    
+    if args.learn_palette:
+        learn_color_palette(args.learn_palette, "bee_swarm_config.json")
+        raise SystemExit(0)
+    
+    if args.soak is not None:
+        raise SystemExit(0 if run_soak_test(args) else 1)
+    
+    if args.load_test:
+        raise SystemExit(0 if run_load_test(args) else 1)
+    
+    if args.spool_test:
+        raise SystemExit(0 if run_spool_test(args) else 1)
+    
+    if args.rules_test:
+        raise SystemExit(0 if run_rules_test(args) else 1)
+    
+    if args.stand_in_webhook is not None:
+        stand_in = StandInWebhookServer(port=args.stand_in_webhook, **stand_in_options(args),
+                                        on_request=lambda path, status, size: print(f"[{datetime.now():%H:%M:%S}] POST {path} {size} bytes -> {status}"))
+        print(f"Stand-in webhook listening at {stand_in.url}")
+        print("POST /__fail?status=503 to simulate an outage, POST /__recover to end it.")
+        try:
+            stand_in.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        raise SystemExit(0)
+    
     try:
         app = BeeSwarmNotifier()
         app.run()